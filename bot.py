@@ -1,8 +1,17 @@
 import logging
 import asyncio
-from src.config import get_bot_config, TOKEN
-from src.message_handler import process_message
+from src.config import get_bot_config, TOKEN, TRACKER_ONLY
+from src.message_handler import process_message, get_fast_response, keyword_router
+from src.ai_handler import reload_system_prompt
+from src.persona_registry import persona_registry
+from src.admission import admission, AdmissionRejected
+from src.streaming_reply import StreamingReply, STREAM_EDIT_INTERVAL
 from src.lol_tracker import lol_tracker
+from src.riot_tracker import riot_tracker
+from src.sharding import get_shard_coordinator
+from src.notification_queue import notification_queue
+from src.riot_http import riot_http
+from src.llm_client import llm_client
 import discord
 
 # Set up logging
@@ -15,96 +24,178 @@ logger = logging.getLogger(__name__)
 # Initialize bot with reconnect enabled
 bot = get_bot_config()
 
-@bot.event
-async def on_ready():
-    logger.info(f'{bot.user} đã sẵn sàng phục vụ!')
+# Presence activity names (lowercase substrings) -> tracker key
+GAME_ACTIVITIES = {
+    "league of legends": "lol",
+    "valorant": "valorant",
+}
+GAME_TRACKERS = {
+    "lol": lol_tracker,
+    "valorant": riot_tracker,
+}
+# Game selector words accepted by the tracking commands -> tracker key
+GAME_ALIASES = {
+    "lol": "lol",
+    "league": "lol",
+    "valorant": "valorant",
+    "valo": "valorant",
+    "val": "valorant",
+}
+
+def parse_game_selector(parts: list, default_games: list, min_args: int = 0) -> tuple:
+    """Split an optional game selector off command arguments, e.g. `!track val Name Tag`.
     
-    # Start League of Legends match monitoring
-    if not lol_tracker.is_running:
-        # Set notification channel to the first available text channel
-        for guild in bot.guilds:
+    Returns (games, remaining_parts), with `default_games` when no selector is given.
+    The selector is only taken if `min_args` arguments remain, so a Riot name like
+    "val" still works in `!track val 1234`.
+    """
+    if len(parts) > min_args + 1 and parts[1].lower() in GAME_ALIASES:
+        return [GAME_ALIASES[parts[1].lower()]], [parts[0]] + parts[2:]
+    return default_games, parts
+
+def game_names(games: list) -> str:
+    return " và ".join(GAME_TRACKERS[game].adapter.display_name for game in games)
+
+# Tracker worker sharding (only when TRACKER_WORKER_ID is set)
+shard_coordinator = get_shard_coordinator()
+if shard_coordinator is not None:
+    for tracker in GAME_TRACKERS.values():
+        tracker.attach_shards(shard_coordinator)
+
+# Replies still being generated: {message_id: task}
+pending_replies = {}
+
+# Build the AI system prompt once at startup; it hot-reloads when prompts.txt changes
+reload_system_prompt()
+persona_registry.load()
+
+def setup_guild(guild):
+    """Give a guild a default notification channel and adopt its members tracked before per-guild tracking."""
+    for game, tracker in GAME_TRACKERS.items():
+        guild_id = str(guild.id)
+        if tracker.guilds.get_channel(guild_id) is None:
+            # Default to the first text channel we can write to
             for channel in guild.text_channels:
                 if channel.permissions_for(guild.me).send_messages:
-                    lol_tracker.set_notification_channel(channel.id)
-                    logger.info(f"Set notification channel to: {channel.name} ({channel.id})")
+                    tracker.set_notification_channel(channel.id, guild_id)
+                    logger.info(f"Set {game} notification channel for {guild.name} to: {channel.name} ({channel.id})")
                     break
-            if lol_tracker.notification_channel_id:
-                break
-        
-        # Start monitoring in background
-        asyncio.create_task(lol_tracker.start_monitoring(bot, check_interval=30))
-        logger.info("League of Legends match monitoring started")
+        for discord_user_id in tracker.tracked_players:
+            if not tracker.guilds.guilds_of(discord_user_id) and guild.get_member(int(discord_user_id)):
+                tracker.guilds.add_member(guild_id, discord_user_id)
+
+@bot.event
+async def on_ready():
+    logger.info(f'{bot.user} đã sẵn sàng phục vụ!')
+    
+    for guild in bot.guilds:
+        setup_guild(guild)
+    
+    if shard_coordinator is not None:
+        shard_coordinator.start()
+    
+    # Start match monitoring for every game; they share one poll loop and scheduler
+    for game, tracker in GAME_TRACKERS.items():
+        if not tracker.is_running:
+            # Start monitoring in background
+            asyncio.create_task(tracker.start_monitoring(bot, check_interval=30))
+            logger.info(f"{tracker.adapter.display_name} match monitoring started")
+
+@bot.event
+async def on_guild_join(guild):
+    setup_guild(guild)
 
 @bot.event
 async def on_message(message):
-    # Ignore messages from the bot itself
-    if message.author == bot.user:
+    # Ignore messages from the bot itself, and all messages on tracker-only workers
+    if message.author == bot.user or TRACKER_ONLY:
         return
     
     # Ignore empty messages
     if not message.content or message.content.strip() == "":
         return
     
-    # Handle League of Legends tracking commands
+    # Handle League of Legends / Valorant tracking commands
     content = message.content.strip()
+    # Tracking commands apply to the server they're sent in (None in DMs)
+    guild_id = str(message.guild.id) if message.guild else None
     
-    # Command: !link <riot_name> <riot_tag>
+    # Command: !link [lol|valorant] <riot_name> <riot_tag>
     if content.startswith("!link"):
         try:
-            parts = content.split()
+            # One Riot account plays every game, so link it for all of them by default
+            games, parts = parse_game_selector(content.split(), list(GAME_TRACKERS), min_args=2)
             if len(parts) >= 3:
                 riot_name = parts[1]
                 riot_tag = parts[2]
                 discord_user_id = str(message.author.id)
                 
-                lol_tracker.link_discord_to_riot(discord_user_id, riot_name, riot_tag)
-                lol_tracker.add_tracked_player(discord_user_id, riot_name, riot_tag)
+                for game in games:
+                    GAME_TRACKERS[game].link_discord_to_riot(discord_user_id, riot_name, riot_tag)
+                # Track right away in this server for the first game; everything else
+                # starts once presence shows them playing in a server
+                if guild_id is not None:
+                    GAME_TRACKERS[games[0]].add_tracked_player(discord_user_id, riot_name, riot_tag, guild_id)
                 await message.channel.send(
                     f"✅ Đã liên kết tài khoản Discord với {riot_name}#{riot_tag}!\n"
-                    f"Bot sẽ tự động theo dõi khi bạn chơi League of Legends."
+                    f"Bot sẽ tự động theo dõi khi bạn chơi {game_names(games)}."
                 )
             else:
                 await message.channel.send(
-                    "❌ Cú pháp: `!link <tên_riot> <tag_riot>`\n"
-                    "Ví dụ: `!link PlayerName 1234`"
+                    "❌ Cú pháp: `!link [lol|valorant] <tên_riot> <tag_riot>`\n"
+                    "Ví dụ: `!link PlayerName 1234` hoặc `!link valorant PlayerName 1234`"
                 )
         except Exception as e:
             logger.error(f"Error linking account: {str(e)}")
             await message.channel.send(f"❌ Lỗi: {str(e)}")
         return
     
-    # Command: !track <riot_name> <riot_tag>
+    # Command: !track [lol|valorant] <riot_name> <riot_tag>
     if content.startswith("!track"):
         try:
-            parts = content.split()
+            if guild_id is None:
+                # Notifications go to a server's channel, so there's nowhere to send them
+                await message.channel.send("❌ Lệnh này chỉ dùng được trong server.")
+                return
+            games, parts = parse_game_selector(content.split(), ["lol"], min_args=2)
             if len(parts) >= 3:
                 riot_name = parts[1]
                 riot_tag = parts[2]
                 discord_user_id = str(message.author.id)
                 
-                lol_tracker.add_tracked_player(discord_user_id, riot_name, riot_tag)
+                for game in games:
+                    GAME_TRACKERS[game].add_tracked_player(discord_user_id, riot_name, riot_tag, guild_id)
                 await message.channel.send(
-                    f"✅ Đã thêm {riot_name}#{riot_tag} vào danh sách theo dõi!"
+                    f"✅ Đã thêm {riot_name}#{riot_tag} vào danh sách theo dõi {game_names(games)}!"
                 )
             else:
                 await message.channel.send(
-                    "❌ Cú pháp: `!track <tên_riot> <tag_riot>`\n"
-                    "Ví dụ: `!track PlayerName 1234`"
+                    "❌ Cú pháp: `!track [lol|valorant] <tên_riot> <tag_riot>`\n"
+                    "Ví dụ: `!track PlayerName 1234` hoặc `!track valorant PlayerName 1234`"
                 )
         except Exception as e:
             logger.error(f"Error adding tracked player: {str(e)}")
             await message.channel.send(f"❌ Lỗi: {str(e)}")
         return
     
-    # Command: !untrack
+    # Command: !untrack [lol|valorant]
     if content.startswith("!untrack"):
         try:
+            games, _ = parse_game_selector(content.split(), list(GAME_TRACKERS))
             discord_user_id = str(message.author.id)
-            if discord_user_id in lol_tracker.tracked_players:
-                player_info = lol_tracker.tracked_players[discord_user_id]
-                lol_tracker.remove_tracked_player(discord_user_id)
+            removed = []
+            for game in games:
+                tracker = GAME_TRACKERS[game]
+                tracked_here = guild_id is None or discord_user_id in tracker.guilds.members_of(guild_id)
+                if discord_user_id in tracker.tracked_players and tracked_here:
+                    player_info = tracker.tracked_players[discord_user_id]
+                    tracker.remove_tracked_player(discord_user_id, guild_id)
+                    removed.append((game, player_info))
+            if removed:
+                player_info = removed[0][1]
                 await message.channel.send(
-                    f"✅ Đã xóa {player_info['riot_name']}#{player_info['riot_tag']} khỏi danh sách theo dõi!"
+                    f"✅ Đã xóa {player_info['riot_name']}#{player_info['riot_tag']} khỏi danh sách theo dõi "
+                    f"{game_names([game for game, _ in removed])}!"
                 )
             else:
                 await message.channel.send("❌ Bạn chưa được thêm vào danh sách theo dõi.")
@@ -116,10 +207,15 @@ async def on_message(message):
     # Command: !set channel
     if content.startswith("!set channel"):
         try:
+            if guild_id is None:
+                await message.channel.send("❌ Lệnh này chỉ dùng được trong server.")
+                return
             if message.author.guild_permissions.administrator:
-                lol_tracker.set_notification_channel(message.channel.id)
+                games, _ = parse_game_selector(content.split()[1:], list(GAME_TRACKERS))
+                for game in games:
+                    GAME_TRACKERS[game].set_notification_channel(message.channel.id, guild_id)
                 await message.channel.send(
-                    f"✅ Đã đặt kênh này ({message.channel.name}) làm kênh thông báo!"
+                    f"✅ Đã đặt kênh này ({message.channel.name}) làm kênh thông báo {game_names(games)}!"
                 )
             else:
                 await message.channel.send("❌ Bạn cần quyền Administrator để sử dụng lệnh này.")
@@ -128,18 +224,71 @@ async def on_message(message):
             await message.channel.send(f"❌ Lỗi: {str(e)}")
         return
     
-    # Command: !list
+    # Command: !reload prompt
+    if content.startswith("!reload prompt"):
+        try:
+            if message.author.guild_permissions.administrator:
+                reload_system_prompt()
+                await message.channel.send("✅ Đã tải lại prompts.txt!")
+            else:
+                await message.channel.send("❌ Bạn cần quyền Administrator để sử dụng lệnh này.")
+        except Exception as e:
+            logger.error(f"Error reloading prompt: {str(e)}")
+            await message.channel.send(f"❌ Lỗi: {str(e)}")
+        return
+    
+    # Command: !reload personas
+    if content.startswith("!reload personas"):
+        try:
+            if message.author.guild_permissions.administrator:
+                count = persona_registry.load()
+                await message.channel.send(f"✅ Đã tải lại personas.json ({count} persona)!")
+            else:
+                await message.channel.send("❌ Bạn cần quyền Administrator để sử dụng lệnh này.")
+        except Exception as e:
+            logger.error(f"Error reloading personas: {str(e)}")
+            await message.channel.send(f"❌ Lỗi: {str(e)}")
+        return
+    
+    # Command: !rules
+    if content.startswith("!rules"):
+        try:
+            if message.author.guild_permissions.administrator:
+                rules_list = [f"• {name}: {hits}" for name, hits in keyword_router.stats().items()]
+                await message.channel.send(
+                    f"📊 **Số lần các từ khóa được kích hoạt:**\n" + "\n".join(rules_list)
+                )
+            else:
+                await message.channel.send("❌ Bạn cần quyền Administrator để sử dụng lệnh này.")
+        except Exception as e:
+            logger.error(f"Error listing keyword rule stats: {str(e)}")
+            await message.channel.send(f"❌ Lỗi: {str(e)}")
+        return
+    
+    # Command: !list [lol|valorant]
     if content.startswith("!list"):
         try:
-            if len(lol_tracker.tracked_players) == 0:
+            if guild_id is None:
+                # Lists are per server; a DM must not show other servers' players
+                await message.channel.send("❌ Lệnh này chỉ dùng được trong server.")
+                return
+            games, _ = parse_game_selector(content.split(), list(GAME_TRACKERS))
+            sections = []
+            for game in games:
+                tracker = GAME_TRACKERS[game]
+                # Only this server's players
+                player_ids = [uid for uid in tracker.guilds.members_of(guild_id) if uid in tracker.tracked_players]
+                if player_ids:
+                    players_list = [
+                        f"• {tracker.tracked_players[uid]['riot_name']}#{tracker.tracked_players[uid]['riot_tag']}"
+                        for uid in player_ids
+                    ]
+                    sections.append(f"**{tracker.adapter.display_name}:**\n" + "\n".join(players_list))
+            if len(sections) == 0:
                 await message.channel.send("📋 Chưa có người chơi nào được theo dõi.")
             else:
-                players_list = [
-                    f"• {player_info['riot_name']}#{player_info['riot_tag']}"
-                    for player_info in lol_tracker.tracked_players.values()
-                ]
                 await message.channel.send(
-                    f"📋 **Danh sách người chơi được theo dõi:**\n" + "\n".join(players_list)
+                    f"📋 **Danh sách người chơi được theo dõi:**\n" + "\n".join(sections)
                 )
         except Exception as e:
             logger.error(f"Error listing tracked players: {str(e)}")
@@ -150,43 +299,95 @@ async def on_message(message):
     user_name = message.author.display_name
     prompt = message.content.strip()
     
+    # Keyword answers don't need the AI, so they skip the debounce and rate limits
+    fast_response = get_fast_response(prompt, user_name, message.author.id)
+    if fast_response:
+        await message.channel.send(fast_response)
+        return
+    
+    # Register the reply so deleting the message cancels it (and its LLM call)
+    pending_replies[message.id] = asyncio.current_task()
     try:
+        # Merge bursts from the same user and drop messages over the rate limit
+        prompt = await admission.admit(message.author.id, message.channel.id, prompt)
+        if prompt is None:
+            return
+        
+        # Post the reply early and edit it as the AI writes it
+        reply = StreamingReply(message.channel, edit_interval=STREAM_EDIT_INTERVAL)
+        on_partial = reply.update if STREAM_EDIT_INTERVAL > 0 else None
+        
         # Process message and send response (now async)
-        logger.info(f"Processing message from {user_name}: {prompt}")
-        response = await process_message(prompt, user_name)
+        async with admission.in_flight():
+            logger.info(f"Processing message from {user_name}: {prompt}")
+            response = await process_message(prompt, user_name, message.author.id, on_partial, message.channel.id)
         
         # Only send response if we got one
-        if response:
-            await message.channel.send(response)
+        await reply.finish(response)
+    except asyncio.CancelledError:
+        logger.info(f"Message {message.id} was deleted, cancelled reply")
+    except AdmissionRejected as e:
+        logger.warning(f"Dropped message from {user_name}: {str(e)}")
     except Exception as e:
         logger.error(f"Lỗi khi xử lý tin nhắn: {str(e)}")
+    finally:
+        pending_replies.pop(message.id, None)
+
+@bot.event
+async def on_raw_message_delete(payload):
+    """Cancel the reply to a message that was deleted before we answered it."""
+    task = pending_replies.pop(payload.message_id, None)
+    if task and not task.done():
+        task.cancel()
 
 @bot.event
 async def on_error(event, *args, **kwargs):
     logger.error(f"Lỗi trong event {event}: {str(args)} - {str(kwargs)}")
 
+def get_game_activities(member) -> dict:
+    """Return {tracker key: activity} for the tracked games a member's activities show them playing."""
+    games = {}
+    for activity in member.activities or ():
+        name = (activity.name or "").lower()
+        for game_name, game_key in GAME_ACTIVITIES.items():
+            if game_name in name:
+                games.setdefault(game_key, activity)
+    return games
+
+def activity_state(activity) -> tuple:
+    """The rich presence fields that change between lobby, in game and post-game."""
+    return (activity.name, getattr(activity, "state", None), getattr(activity, "details", None))
+
 @bot.event
 async def on_presence_update(before, after):
-    """Detect when a user starts playing League of Legends and auto-track them."""
+    """Turn game start/stop presence transitions into immediate targeted match checks."""
     try:
-        if not after.activity or not after.activity.name:
-            return
-        
-        game_name = after.activity.name.lower()
         discord_user_id = str(after.id)
+        guild_id = str(after.guild.id)
+        # Look the game up among all activities: a custom status or Spotify may come first
+        before_games = get_game_activities(before)
+        after_games = get_game_activities(after)
         
-        # Check if playing League of Legends
-        if "league of legends" in game_name or "league" in game_name or "lol" in game_name:
-            if discord_user_id in lol_tracker.discord_to_riot:
-                riot_info = lol_tracker.discord_to_riot[discord_user_id]
-                riot_name = riot_info["riot_name"]
-                riot_tag = riot_info["riot_tag"]
-                
-                if discord_user_id not in lol_tracker.tracked_players:
-                    lol_tracker.add_tracked_player(discord_user_id, riot_name, riot_tag)
-                    logger.info(f"Auto-tracked {after.display_name} ({riot_name}#{riot_tag}) - started playing League of Legends")
-            else:
-                logger.info(f"User {after.display_name} is playing League of Legends but hasn't linked Riot account")
+        for game in before_games.keys() | after_games.keys():
+            tracker = GAME_TRACKERS[game]
+            started = game in after_games and game not in before_games
+            stopped = game in before_games and game not in after_games
+            
+            if started and discord_user_id not in tracker.guilds.members_of(guild_id):
+                # Auto-track linked users in this server when they start playing
+                if discord_user_id in tracker.discord_to_riot:
+                    riot_info = tracker.discord_to_riot[discord_user_id]
+                    tracker.add_tracked_player(discord_user_id, riot_info["riot_name"], riot_info["riot_tag"], guild_id)
+                    logger.info(f"Auto-tracked {after.display_name} ({riot_info['riot_name']}#{riot_info['riot_tag']}) - started playing {game}")
+                else:
+                    logger.info(f"User {after.display_name} is playing {game} but hasn't linked Riot account")
+                    continue
+            
+            if started or stopped:
+                tracker.on_game_presence(discord_user_id, playing=started)
+            elif activity_state(before_games[game]) != activity_state(after_games[game]):
+                # Rich presence changed mid-session (e.g. lobby -> in game): poll them now
+                tracker.request_check(discord_user_id)
                 
     except Exception as e:
         logger.error(f"Error in presence update: {str(e)}")
@@ -195,11 +396,25 @@ async def on_presence_update(before, after):
 async def on_disconnect():
     logger.warning("Bot đã mất kết nối từ Discord")
 
+async def shutdown():
+    """Deliver queued match notifications, then close the Riot and LLM connection pools."""
+    try:
+        await asyncio.wait_for(notification_queue.drain(), timeout=15)
+    except asyncio.TimeoutError:
+        logger.warning("Gave up on queued notifications at shutdown")
+    await riot_http.close()
+    await llm_client.close()
+
+# Runs whenever the client closes, before it disconnects from Discord
+bot.close_callbacks.append(shutdown)
+
 # Run the bot with auto-reconnect
 while True:
     try:
         logger.info("Đang kết nối tới Discord...")
         bot.run(TOKEN)
+        # run() only returns once the bot was closed or interrupted (Ctrl+C)
+        break
     except discord.errors.ConnectionClosed:
         logger.warning("Mất kết nối. Đang thử kết nối lại...")
         continue
@@ -0,0 +1,145 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, List, Optional, Tuple
+from src.rate_limiter import TokenBucket
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """Raised when the reply queue is full and a message has to be dropped."""
+
+class _Batch:
+    """Messages from one user in one channel waiting out the debounce window."""
+
+    def __init__(self, text: str):
+        self.parts: List[str] = [text]
+        self.started_at = time.monotonic()
+        self.updated = asyncio.Event()
+
+class AdmissionController(LoopBound):
+    """Decides which chat messages get an LLM reply, and when.
+
+    - Messages from the same user in the same channel that arrive within `debounce`
+      seconds of each other are merged into one prompt (at most `max_wait` seconds
+      after the first one), so pasting ten lines costs one call and one reply.
+    - Each merged prompt costs one token from the user's and the channel's token
+      bucket; prompts over the limit are dropped.
+    - At most `max_in_flight` replies are generated at once; up to `max_queue` more
+      wait their turn in FIFO order, anything beyond that is rejected.
+    """
+
+    def __init__(self, user_limit: Tuple[int, int] = (5, 60), channel_limit: Tuple[int, int] = (20, 60),
+                 debounce: float = 1.5, max_wait: float = 5.0, max_in_flight: int = 4, max_queue: int = 20):
+        self.user_limit = user_limit  # (replies, per seconds)
+        self.channel_limit = channel_limit
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._user_buckets: Dict[Hashable, TokenBucket] = {}
+        self._channel_buckets: Dict[Hashable, TokenBucket] = {}
+        self._batches: Dict[Tuple[Hashable, Hashable], _Batch] = {}  # {(channel_id, user_id): batch}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    def _reset_loop_state(self):
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._batches = {}
+        self._waiting = 0
+
+    @staticmethod
+    def _get_bucket(buckets: Dict[Hashable, TokenBucket], key: Hashable, limit: Tuple[int, int],
+                    now: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) > 1000:
+                # Forget buckets that have refilled completely, they carry no state
+                for stale in [k for k, b in buckets.items() if b.wait_time(now) == 0 and b.tokens >= b.limit]:
+                    del buckets[stale]
+            bucket = buckets[key] = TokenBucket(*limit)
+        return bucket
+
+    async def admit(self, user_id: Hashable, channel_id: Hashable, text: str) -> Optional[str]:
+        """Wait out the debounce window and return the merged prompt to answer.
+
+        Returns None if `text` was merged into an earlier message's prompt (that
+        message's caller answers it) or if the user or channel is rate limited.
+        """
+        self._check_loop()
+        key = (channel_id, user_id)
+        batch = self._batches.get(key)
+        if batch is not None:
+            batch.parts.append(text)
+            batch.updated.set()
+            return None
+
+        if not self._admit_tokens(user_id, channel_id, time.monotonic()):
+            return None
+        if self.debounce <= 0:
+            return text
+
+        batch = self._batches[key] = _Batch(text)
+        try:
+            while True:
+                remaining = batch.started_at + self.max_wait - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.updated.clear()
+                try:
+                    await asyncio.wait_for(batch.updated.wait(), min(self.debounce, remaining))
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            if self._batches.get(key) is batch:
+                del self._batches[key]
+        if len(batch.parts) > 1:
+            logger.info(f"Merged {len(batch.parts)} messages from {user_id} in {channel_id} into one reply")
+        return "\n".join(batch.parts)
+
+    def _admit_tokens(self, user_id: Hashable, channel_id: Hashable, now: float) -> bool:
+        user_bucket = self._get_bucket(self._user_buckets, user_id, self.user_limit, now)
+        channel_bucket = self._get_bucket(self._channel_buckets, channel_id, self.channel_limit, now)
+        # Check both before consuming either, so a rejected message costs nothing
+        if user_bucket.wait_time(now) > 0 or channel_bucket.wait_time(now) > 0:
+            logger.info(f"Rate limited reply for user {user_id} in channel {channel_id}")
+            return False
+        user_bucket.consume()
+        channel_bucket.consume()
+        return True
+
+    @asynccontextmanager
+    async def in_flight(self):
+        """Hold one of the `max_in_flight` reply slots, queueing if they're all taken.
+
+        Raises AdmissionRejected if `max_queue` replies are already waiting.
+        """
+        self._check_loop()
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise AdmissionRejected(f"{self._waiting} replies already queued")
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+def _parse_limit(value: str) -> Tuple[int, int]:
+    """Parse "5:60" (5 replies per 60 seconds)."""
+    amount, window = value.split(":")
+    return int(amount), int(window)
+
+# Global admission controller for chat replies
+admission = AdmissionController(
+    user_limit=_parse_limit(os.getenv("CHAT_USER_RATE_LIMIT", "5:60")),
+    channel_limit=_parse_limit(os.getenv("CHAT_CHANNEL_RATE_LIMIT", "20:60")),
+    debounce=float(os.getenv("CHAT_DEBOUNCE", "1.5")),
+    max_in_flight=int(os.getenv("CHAT_MAX_IN_FLIGHT", "4")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "20"))
+)
@@ -1,16 +1,30 @@
 import os
+import time
+import asyncio
 import logging
+from typing import Awaitable, Callable, Dict, List, Optional
 from dotenv import load_dotenv
+from src.llm_client import llm_client
+from src.llm_router import Provider, ProviderRouter
+from src.response_cache import response_cache
+from src.conversation_memory import conversation_memory, is_follow_up
 
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Resolved from the repo root so the bot works from any working directory
+PROMPTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts.txt")
+PROMPT_CHECK_INTERVAL = 5.0  # Seconds between prompts.txt mtime checks
+
+# Built system prompt, shared by every get_ai_response caller
+_prompt_cache = {"prompt": None, "mtime": None, "checked_at": 0.0}
+
 def load_prompts():
     """Load prompts from prompts.txt file."""
     try:
-        with open('prompts.txt', 'r', encoding='utf-8') as f:
+        with open(PROMPTS_PATH, 'r', encoding='utf-8') as f:
             content = f.read()
         return content
     except FileNotFoundError:
@@ -26,9 +40,34 @@ Chỉ nói tiếng Việt, nếu nói ngôn ngữ khác thì trả lời là "T
 Những câu hỏi không nằm trong pattern trả lời là "Tôi bị ngu"
 """
 
+def _get_prompts_mtime():
+    try:
+        return os.stat(PROMPTS_PATH).st_mtime
+    except OSError:
+        return None
+
+def reload_system_prompt():
+    """Re-read prompts.txt and rebuild the cached system prompt."""
+    _prompt_cache["mtime"] = _get_prompts_mtime()
+    _prompt_cache["prompt"] = render_system_prompt(load_prompts())
+    _prompt_cache["checked_at"] = time.monotonic()
+    logger.info("Loaded system prompt from prompts.txt")
+    return _prompt_cache["prompt"]
+
 def build_system_prompt():
-    """Build system prompt from prompts.txt."""
-    prompts = load_prompts()
+    """Get the cached system prompt, rebuilding it only when prompts.txt changes."""
+    if _prompt_cache["prompt"] is None:
+        return reload_system_prompt()
+    
+    now = time.monotonic()
+    if now - _prompt_cache["checked_at"] >= PROMPT_CHECK_INTERVAL:
+        _prompt_cache["checked_at"] = now
+        if _get_prompts_mtime() != _prompt_cache["mtime"]:
+            return reload_system_prompt()
+    return _prompt_cache["prompt"]
+
+def render_system_prompt(prompts: str) -> str:
+    """Build system prompt from the contents of prompts.txt."""
     system_prompt = f"""Bạn là một chatbot Discord tên là Nguyễn Đình Thống. Hãy trả lời các câu hỏi dựa trên thông tin sau:
 
 {prompts}
@@ -36,103 +75,153 @@ def build_system_prompt():
 Hãy trả lời một cách tự nhiên, đùa cợt, trẻ trung và châm biếm như đã yêu cầu. Chỉ trả lời bằng tiếng Việt."""
     return system_prompt
 
-async def get_ai_response(user_message: str, user_name: str = "") -> str:
+async def get_ai_response(user_message: str, user_name: str = "", persona_prompt: Optional[str] = None,
+                          on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+                          channel_id=None) -> str:
     """
     Get AI response using free AI model.
-    Tries Groq first, falls back to Hugging Face if needed.
+    Starts with Groq and hedges with Hugging Face if Groq is slow or failing.
+    `persona_prompt` adds per-user instructions on top of the shared system prompt.
+    With `on_partial`, Groq's answer is streamed and passed to it as it grows.
+    With `channel_id`, this turn is remembered and follow-ups get the channel's recent turns.
     """
     system_prompt = build_system_prompt()
+    if persona_prompt:
+        system_prompt = f"{system_prompt}\n\n{persona_prompt}"
+    history = conversation_memory.history(channel_id)
     
-    # Try Groq API first (free and fast)
-    groq_response = await try_groq_api(system_prompt, user_message, user_name)
-    if groq_response:
-        return groq_response
+    # Standalone questions are answered without the conversation, so repeats hit the
+    # cache even in a busy channel. A follow-up like "tại sao?" means something
+    # different every time, so it gets the history and skips the cache.
+    cacheable = not history or not is_follow_up(user_message)
+    if cacheable:
+        history = []
+        cached_response = response_cache.get(system_prompt, user_message)
+        if cached_response:
+            remember_turn(channel_id, user_message, user_name, cached_response)
+            return cached_response
     
-    # Fallback to Hugging Face
-    hf_response = await try_huggingface_api(system_prompt, user_message, user_name)
-    if hf_response:
-        return hf_response
+    if on_partial is not None and groq_provider.breaker.allow():
+        response = await stream_with_hedging(system_prompt, user_message, user_name, on_partial, history)
+    else:
+        response = await chat_router.complete(system_prompt, user_message, user_name, history)
+    if response:
+        if cacheable:
+            response_cache.put(system_prompt, user_message, response)
+        remember_turn(channel_id, user_message, user_name, response)
+        return response
     
     # Final fallback
     return "Tôi bị ngu"
 
-async def try_groq_api(system_prompt: str, user_message: str, user_name: str) -> str:
-    """Try to get response from Groq API."""
+async def stream_with_hedging(system_prompt: str, user_message: str, user_name: str,
+                              on_partial: Callable[[str], Awaitable[None]],
+                              history: Optional[List[Dict[str, str]]] = None) -> Optional[str]:
+    """Stream Groq's answer, hedging with the other providers like chat_router does.
+
+    If Groq's first token hasn't arrived within its hedge delay, or the stream
+    fails, the fallback providers start and the first usable answer wins.
+    Groq is not called a second time.
+    """
+    first_token = asyncio.Event()
+
+    async def report(text: str):
+        first_token.set()
+        await on_partial(text)
+
+    started = time.monotonic()
+    stream = asyncio.ensure_future(try_groq_stream(system_prompt, user_message, report, history))
+    fallback = None
+    running = {stream}
+
+    def start_fallback():
+        nonlocal fallback
+        fallback = asyncio.ensure_future(stream_fallback_router.complete(system_prompt, user_message, user_name, history))
+        running.add(fallback)
+
     try:
-        from groq import Groq
-        
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            logger.warning("GROQ_API_KEY not found in environment variables")
-            return None
-        
-        client = Groq(api_key=api_key)
-        
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
-        
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # Free and fast model
-            messages=messages,
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        return response.choices[0].message.content.strip()
-    except ImportError:
-        logger.warning("groq package not installed")
-        return None
-    except Exception as e:
-        logger.error(f"Error calling Groq API: {str(e)}")
+        waiter = asyncio.ensure_future(first_token.wait())
+        try:
+            await asyncio.wait({stream, waiter}, timeout=groq_provider.hedge_delay(), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if not first_token.is_set() and not stream.done():
+            logger.info("Groq stream is slow to start, hedging with the fallback providers")
+            start_fallback()
+
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                running.discard(task)
+                if task is stream:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"Groq streaming failed: {str(e)}")
+                        result = None
+                    if result:
+                        # Same measure as the router's one-shot calls, so hedge_delay() keeps adapting
+                        groq_provider.latencies.append(time.monotonic() - started)
+                        groq_provider.breaker.record_success()
+                    else:
+                        groq_provider.breaker.record_failure()
+                else:
+                    result = task.result()
+                if result:
+                    return result
+            if fallback is None:
+                start_fallback()
         return None
+    finally:
+        for task in running:
+            task.cancel()
 
-async def try_huggingface_api(system_prompt: str, user_message: str, user_name: str) -> str:
+def remember_turn(channel_id, user_message: str, user_name: str, response: str):
+    """Record a question and its answer in the channel's conversation memory."""
+    # Several people talk in one channel, so user turns carry the speaker's name
+    conversation_memory.add(channel_id, "user", f"{user_name}: {user_message}" if user_name else user_message)
+    conversation_memory.add(channel_id, "assistant", response)
+
+def build_chat_messages(system_prompt: str, user_message: str,
+                        history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    """System prompt, then the conversation so far, then the new message."""
+    return [
+        {"role": "system", "content": system_prompt},
+        *(history or []),
+        {"role": "user", "content": user_message}
+    ]
+
+async def try_groq_api(system_prompt: str, user_message: str, user_name: str,
+                       history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Try to get response from Groq API."""
+    messages = build_chat_messages(system_prompt, user_message, history)
+    return await llm_client.groq_chat(messages, temperature=0.7, max_tokens=500)
+
+async def try_groq_stream(system_prompt: str, user_message: str,
+                          on_partial: Callable[[str], Awaitable[None]],
+                          history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Stream a response from Groq API, reporting the text so far to `on_partial`."""
+    messages = build_chat_messages(system_prompt, user_message, history)
+    text = ""
+    async for delta in llm_client.groq_chat_stream(messages, temperature=0.7, max_tokens=500):
+        text += delta
+        await on_partial(text)
+    return text.strip()
+
+async def try_huggingface_api(system_prompt: str, user_message: str, user_name: str,
+                              history: Optional[List[Dict[str, str]]] = None) -> str:
     """Try to get response from Hugging Face Inference API."""
-    try:
-        import requests
-        
-        api_key = os.getenv("HUGGINGFACE_API_KEY")
-        model = "vinai/PhoGPT-7B5-Instruct"  # Vietnamese model
-        
-        # If no API key, try without authentication (may have rate limits)
-        headers = {}
-        if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-        
-        # Build prompt
-        full_prompt = f"{system_prompt}\n\nNgười dùng: {user_message}\nBạn:"
-        
-        payload = {
-            "inputs": full_prompt,
-            "parameters": {
-                "max_new_tokens": 200,
-                "temperature": 0.7,
-                "return_full_text": False
-            }
-        }
-        
-        response = requests.post(
-            f"https://api-inference.huggingface.co/models/{model}",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                return result[0].get("generated_text", "").strip()
-            elif isinstance(result, dict):
-                return result.get("generated_text", "").strip()
-        
-        logger.warning(f"Hugging Face API returned status {response.status_code}")
-        return None
-    except ImportError:
-        logger.warning("requests package not installed")
-        return None
-    except Exception as e:
-        logger.error(f"Error calling Hugging Face API: {str(e)}")
-        return None
+    # Build prompt
+    conversation = "".join(
+        f"{'Người dùng' if turn['role'] == 'user' else 'Bạn'}: {turn['content']}\n"
+        for turn in history or []
+    )
+    full_prompt = f"{system_prompt}\n\n{conversation}Người dùng: {user_message}\nBạn:"
+    return await llm_client.huggingface_generate(full_prompt, max_new_tokens=200, temperature=0.7)
 
+# Chat providers in priority order: Groq (free and fast), then Hugging Face
+groq_provider = Provider("groq", try_groq_api)
+huggingface_provider = Provider("huggingface", try_huggingface_api)
+chat_router = ProviderRouter([groq_provider, huggingface_provider])
+# Hedges a Groq stream, so Groq itself is left out
+stream_fallback_router = ProviderRouter([huggingface_provider])
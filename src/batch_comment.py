@@ -0,0 +1,60 @@
+import json
+import logging
+from typing import List
+from src.ai_handler import try_groq_api
+from src.llm_client import llm_client
+
+logger = logging.getLogger(__name__)
+
+async def generate_comments(system_prompt: str, summaries: List[str], fallbacks: List[str]) -> List[str]:
+    """Get one AI comment per stats summary, using a single LLM call for all of them.
+
+    Several players are sent together and the model answers with a JSON object
+    {"1": comment, "2": comment, ...}. Any player whose comment is missing (or the
+    whole call failing) gets the matching rule-based comment from `fallbacks`.
+    """
+    if len(summaries) == 1:
+        user_message = f"{summaries[0]}\nHãy đưa ra một nhận xét ngắn gọn và hài hước về trận đấu này:"
+        try:
+            comment = await try_groq_api(system_prompt, user_message, "")
+            if comment:
+                return [comment.strip()]
+        except Exception as e:
+            logger.error(f"Error generating AI comment: {str(e)}")
+        return list(fallbacks)
+
+    numbered = "\n".join(f"Người chơi {i}:{summary}" for i, summary in enumerate(summaries, 1))
+    keys = ", ".join(f'"{i}": "..."' for i in range(1, len(summaries) + 1))
+    user_message = (
+        f"{numbered}\n"
+        f"Hãy đưa ra một nhận xét ngắn gọn và hài hước riêng cho từng người chơi ở trên. "
+        f"Chỉ trả lời bằng một JSON object dạng {{{keys}}}, mỗi key là số thứ tự người chơi."
+    )
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message}
+    ]
+
+    comments = {}
+    try:
+        response = await llm_client.groq_chat(messages, temperature=0.7, max_tokens=120 * len(summaries),
+                                              json_mode=True)
+        if response:
+            parsed = json.loads(response)
+            if isinstance(parsed, dict):
+                comments = parsed
+    except Exception as e:
+        logger.error(f"Error generating batched AI comments: {str(e)}")
+
+    results = []
+    missing = 0
+    for i, fallback in enumerate(fallbacks, 1):
+        comment = comments.get(str(i))
+        if isinstance(comment, str) and comment.strip():
+            results.append(comment.strip())
+        else:
+            results.append(fallback)
+            missing += 1
+    if missing:
+        logger.info(f"Used rule-based comments for {missing} of {len(summaries)} players")
+    return results
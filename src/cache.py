@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+class TTLCache(LoopBound):
+    """Async lookup cache with a positive TTL, a shorter negative TTL and in-flight de-duplication.
+
+    A fetch returning None is cached as a miss for `negative_ttl` seconds (e.g. a 404).
+    A fetch raising is not cached, so transient errors are retried on the next lookup.
+    Concurrent lookups for the same key share a single fetch.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}  # {key: (value, expires_at)}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _reset_loop_state(self):
+        # Fetches in flight on the old loop will never finish
+        self._inflight = {}
+
+    def get(self, key: Hashable) -> Tuple[bool, Optional[Any]]:
+        """Return (found, value) for an unexpired entry without fetching."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        return True, value
+
+    def set(self, key: Hashable, value: Any):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries.pop(key, None)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        while len(self._entries) > self.max_entries:
+            # Dicts keep insertion order, so the first key is the oldest write
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        """Return the cached value for `key`, calling `fetch` at most once per expiry."""
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        self._check_loop()
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._load(key, fetch))
+            self._inflight[key] = future
+        # Shield so one cancelled waiter doesn't cancel the fetch the others share
+        return await asyncio.shield(future)
+
+    async def _load(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        try:
+            value = await fetch()
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+class ByteLRUCache(LoopBound):
+    """Async LRU cache bounded by total payload size in bytes, with request coalescing.
+
+    `fetch` returns (value, size_in_bytes), or None for results that must not be cached.
+    Sizes are whatever the caller measures; the match cache uses the raw response body,
+    so it bounds serialized size and the parsed objects in memory are several times larger.
+    Concurrent lookups for the same key share a single fetch.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()  # {key: (value, size)}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _reset_loop_state(self):
+        # Fetches in flight on the old loop will never finish
+        self._inflight = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int):
+        if size > self.max_bytes:
+            logger.info(f"Not caching {key}: {size} bytes exceeds cache size {self.max_bytes}")
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[1]
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[Tuple[Any, int]]]]) -> Optional[Any]:
+        """Return the cached value for `key`, sharing one fetch between concurrent callers."""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self._check_loop()
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._load(key, fetch))
+            self._inflight[key] = future
+        return await asyncio.shield(future)
+
+    async def _load(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[Tuple[Any, int]]]]) -> Optional[Any]:
+        try:
+            result = await fetch()
+            if result is None:
+                return None
+            value, size = result
+            self.set(key, value, size)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+# Match payloads shared by every tracker, so one download serves all tracked participants
+match_cache = ByteLRUCache(max_bytes=int(os.getenv("MATCH_CACHE_BYTES", str(32 * 1024 * 1024))))
@@ -1,10 +1,31 @@
 import discord
 import os
+import logging
+from typing import Awaitable, Callable, List
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
+# Extra tracker workers only poll matches; chat and commands are left to the main process
+TRACKER_ONLY = os.getenv("TRACKER_ONLY", "").lower() in ("1", "true", "yes")
+
+class Bot(discord.Client):
+    """discord.Client that runs cleanup callbacks (e.g. closing connection pools) before disconnecting."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.close_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+    async def close(self):
+        for callback in self.close_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Error during shutdown: {str(e)}")
+        await super().close()
 
 # Bot configuration
 def get_bot_config():
@@ -12,4 +33,9 @@ def get_bot_config():
     intents.message_content = True
     intents.presences = True  # Required for detecting game activities
     intents.members = True    # Required for presence updates
-    return discord.Client(intents=intents) 
\ No newline at end of file
+    # Optional Discord gateway sharding: run one process per shard with the same count
+    shard_id = os.getenv("DISCORD_SHARD_ID")
+    shard_count = os.getenv("DISCORD_SHARD_COUNT")
+    if shard_id is not None and shard_count is not None:
+        return Bot(intents=intents, shard_id=int(shard_id), shard_count=int(shard_count))
+    return Bot(intents=intents) 
\ No newline at end of file
@@ -28,18 +28,44 @@ FUNNY_RESPONSES = [
     "Em là nguyên liệu hoàn hảo cho công thức tình yêu của anh."
 ]
 
-# Special users
-SPECIAL_USERS = {
-    "Kaisen#exson": "Thằng này giả mạo tôi! ",
-    "Skye._": "Địt mẹ mày Minh! ",
-    "DeadBush": "Vâng đại ca! ",
-    "To Man": "Em chào anh! ",
-    "Miin": "Địt mẹ mày Minh Tùng",
-} 
-
 # Special responses
 SPECIAL_RESPONSES = {
     "Minh" : "Đó là bạn thân nhất của tôi ",
     "Mẫn" : "Đó là bạn thân thứ 3 của tôi ",
     "Minh Tùng" : "Đó là bạn thân thứ 2 của tôi "
-}
\ No newline at end of file
+}
+
+# Keyword fast-path rules, compiled into a single matcher at startup.
+# When several rules match a message, the lowest priority number wins.
+KEYWORD_RULES = [
+    {"name": "name", "group": "personal", "priority": 0,
+     "keywords": ["tên"],
+     "response": f"{PERSONAL_INFO['name']} đây! 😎"},
+    {"name": "hometown", "group": "personal", "priority": 1,
+     "keywords": ["quê", "ở đâu"],
+     "response": f"Tớ là dân {PERSONAL_INFO['hometown']} chính hiệu con rồng cháu tiên 😄"},
+    {"name": "gender", "group": "personal", "priority": 2,
+     "keywords": ["giới tính"],
+     "response": f"{PERSONAL_INFO['gender']} nha, đẹp trai lắm 😌"},
+    {"name": "university", "group": "personal", "priority": 3,
+     "keywords": ["học đại học", "đại học"],
+     "response": f"Tớ là sinh viên {PERSONAL_INFO['university']} đó! 🎓"},
+    {"name": "middle_school", "group": "personal", "priority": 4,
+     "keywords": ["thcs", "cấp 2"],
+     "response": f"Hồi cấp 2 tớ học ở {PERSONAL_INFO['middle_school']} 📚"},
+    {"name": "high_school", "group": "personal", "priority": 5,
+     "keywords": ["thpt", "cấp 3"],
+     "response": f"Tớ là cựu học sinh {PERSONAL_INFO['high_school']} nè 🏫"},
+    {"name": "school", "group": "personal", "priority": 6,
+     "keywords": ["trường"],
+     "response": f"Tớ tự hào khi là sinh viên {PERSONAL_INFO['university']} !!"},
+    {"name": "birthday", "group": "personal", "priority": 7,
+     "keywords": ["ngày sinh", "sinh nhật", "sinh ngày", "tuổi"],
+     "response": f"Tớ sinh ngày {PERSONAL_INFO['birthday']} nè! 🎂"},
+    {"name": "minh", "group": "special", "priority": 100,
+     "keywords": ["minh"],
+     "response": f"{SPECIAL_RESPONSES['Minh']}"},
+    {"name": "man", "group": "special", "priority": 101,
+     "keywords": ["mẫn"],
+     "response": f"{SPECIAL_RESPONSES['Mẫn']}"},
+]
@@ -0,0 +1,88 @@
+import os
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, List, Tuple
+from src.utils import normalize_vietnamese
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; Vietnamese runs about 3 characters per token on Llama tokenizers."""
+    return len(text) // 3 + 4
+
+# Openers and pronouns that make a message lean on what was said before
+FOLLOW_UP_OPENERS = ("còn ", "thế ", "vậy ", "nhưng ", "rồi ", "thì ", "và ", "sao ", "tại sao", "ừ", "ok")
+FOLLOW_UP_WORDS = {"nó", "đó", "đấy", "kia", "ấy", "này", "trên", "vừa", "nữa", "tiếp"}
+
+def is_follow_up(message: str) -> bool:
+    """Whether a message probably only makes sense with the earlier turns, e.g. "tại sao?" or "còn nó thì sao"."""
+    text = normalize_vietnamese(message)
+    words = text.split()
+    if len(words) < 3:
+        return True
+    return text.startswith(FOLLOW_UP_OPENERS) or any(word.strip(",.!?") in FOLLOW_UP_WORDS for word in words)
+
+class ConversationMemory:
+    """Recent chat turns per channel, so replies can follow the conversation.
+
+    Each channel keeps a ring buffer of its last `max_turns` turns. history()
+    returns the newest turns that fit in `token_budget`. Channels idle for
+    `idle_ttl` seconds are forgotten, and at most `max_channels` are kept
+    (least recently active dropped first).
+    """
+
+    def __init__(self, max_turns: int = 12, token_budget: int = 800, idle_ttl: float = 1800.0,
+                 max_channels: int = 500):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.idle_ttl = idle_ttl
+        self.max_channels = max_channels
+        # {channel_id: (turns, last_active)}, least recently active first
+        self._channels: "OrderedDict[Hashable, Tuple[Deque[Tuple[str, str]], float]]" = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._channels:
+            channel_id, (_, last_active) = next(iter(self._channels.items()))
+            if len(self._channels) <= self.max_channels and now - last_active < self.idle_ttl:
+                break
+            del self._channels[channel_id]
+
+    def add(self, channel_id: Hashable, role: str, content: str):
+        """Record a turn ("user" or "assistant") in the channel's buffer."""
+        if channel_id is None or not content:
+            return
+        now = time.monotonic()
+        entry = self._channels.pop(channel_id, None)
+        turns = entry[0] if entry is not None else deque(maxlen=self.max_turns)
+        turns.append((role, content))
+        self._channels[channel_id] = (turns, now)
+        self._evict(now)
+
+    def history(self, channel_id: Hashable) -> List[Dict[str, str]]:
+        """The channel's recent turns as chat messages, oldest first, within the token budget."""
+        if channel_id is None:
+            return []
+        self._evict(time.monotonic())
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            return []
+        messages = []
+        used = 0
+        for role, content in reversed(entry[0]):
+            used += estimate_tokens(content)
+            if used > self.token_budget:
+                break
+            messages.append({"role": role, "content": content})
+        messages.reverse()
+        return messages
+
+    def clear(self, channel_id: Hashable):
+        self._channels.pop(channel_id, None)
+
+# Global memory for chat replies
+conversation_memory = ConversationMemory(
+    max_turns=int(os.getenv("CHAT_MEMORY_TURNS", "12")),
+    token_budget=int(os.getenv("CHAT_MEMORY_TOKENS", "800")),
+    idle_ttl=float(os.getenv("CHAT_MEMORY_IDLE", "1800"))
+)
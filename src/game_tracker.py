@@ -0,0 +1,781 @@
+import os
+import time
+import logging
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from src.riot_http import riot_http, RiotAPIError
+from src.cache import TTLCache
+from src.tracker_store import tracker_store
+from src.notification_queue import notification_queue
+from src.guild_routing import GuildRouter, resolve_channel
+from src.poll_scheduler import PollScheduler
+from src.loop_bound import LoopBound
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Routing region (americas, asia, europe) for each RIOT_REGION; everything else is europe.
+# Every routing region serves every account, so this mostly picks the closest one.
+ACCOUNT_ROUTING = {
+    "na": "americas", "na1": "americas", "br": "americas", "br1": "americas", "latam": "americas",
+    "la1": "americas", "la2": "americas", "oce": "americas", "oc1": "americas",
+    "ap": "asia", "kr": "asia", "jp": "asia", "jp1": "asia",
+}
+
+def get_account_region(region: str) -> str:
+    """Get the account API routing region for a RIOT_REGION value."""
+    return ACCOUNT_ROUTING.get(region.lower(), "europe")
+
+class GameAdapter:
+    """One game's Riot endpoints, match-state rules and notification formatting.
+
+    GameTracker runs the shared tracking state machine (in match -> ended ->
+    stats available) on top of these hooks; see LolAdapter and ValorantAdapter.
+    """
+
+    game = ""  # Tracker key and store namespace, e.g. "lol"
+    display_name = ""  # Shown in notifications
+    label = ""  # Short name for logs
+    min_match_duration = 0  # Games can't realistically end sooner than this (seconds)
+    # Poll intervals (seconds) for players not about to finish a game, chosen by activity
+    poll_intervals: Dict[str, float] = {
+        "in_match_early": 300,  # In a game that can't realistically be over yet
+        "recent": 60,  # Played within the last hour
+        "active": 180,  # Played within the last day
+        "dormant": 900,  # Everyone else; presence updates bump them when they start playing
+        "match_end_retry": 20,  # Game over, waiting for its stats to be available
+        "reconcile": 1800,  # Players whose Discord presence tells us when they start/stop playing
+    }
+    player_fields: Dict = {}  # Extra per-player state, with initial values
+
+    def __init__(self):
+        self.api_key = os.getenv("RIOT_API_KEY")
+        self.region = os.getenv("RIOT_REGION", "ap")  # ap, na, eu, kr, etc.
+
+    async def resolve_player(self, player_info: Dict) -> bool:
+        """Look up game-specific IDs once the PUUID is known. False means try again next poll."""
+        return True
+
+    async def get_current_match(self, player_info: Dict) -> Optional[Dict]:
+        """The player's active game payload, or None if they're not in one."""
+        raise NotImplementedError
+
+    def match_id(self, payload: Dict) -> str:
+        """ID of an active game payload."""
+        raise NotImplementedError
+
+    def match_started_at(self, payload: Dict) -> Optional[float]:
+        """Start time (epoch seconds) of an active game, if the payload has one."""
+        return None
+
+    def player_ids(self, player_info: Dict) -> List[str]:
+        """IDs that identify the player in active game payloads."""
+        return [player_info["puuid"]] if player_info.get("puuid") else []
+
+    def participant_ids(self, payload: Dict) -> List[str]:
+        """IDs of everyone in an active game payload, so lobby-mates can share it."""
+        return []
+
+    async def get_ended_match(self, player_info: Dict, match_id: str) -> Optional[Tuple[str, Dict]]:
+        """(match_id, match_data) for a game that just ended, or None until its stats are available."""
+        raise NotImplementedError
+
+    async def find_missed_match(self, player_info: Dict) -> Optional[Tuple[str, Dict]]:
+        """A just-started game the active game API didn't report, as (match_id, match_data)."""
+        return None
+
+    def parse_player_stats(self, match_data: Dict, puuid: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def format_match_stats(self, stats: Dict, player_name: str) -> str:
+        raise NotImplementedError
+
+    async def generate_match_comments(self, players: List[Tuple[Dict, str]]) -> List[str]:
+        raise NotImplementedError
+
+class LobbyIndex:
+    """Per-cycle index of active games, so tracked players in one lobby share an active game call."""
+
+    def __init__(self, tracked_players: Dict[str, Dict], adapter: GameAdapter):
+        self.adapter = adapter
+        self.games: Dict[str, Optional[Dict]] = {}  # {game_id: active game payload, or None once it ended}
+        self.player_games: Dict[str, str] = {}  # {discord_user_id: game_id} - seen in another player's payload
+        self._inflight: Dict[str, asyncio.Future] = {}  # {game_id: call checking a known game}
+        self._new_game_calls: Set[asyncio.Future] = set()  # Calls for players not known to be in a game
+        # Only payloads listing their participants can reveal a lobby-mate's game
+        self._shares_lobbies = type(adapter).participant_ids is not GameAdapter.participant_ids
+        self._by_id = {player_id: uid for uid, info in tracked_players.items() for player_id in adapter.player_ids(info)}
+        self.calls_saved = 0
+
+    def add_game(self, payload: Dict):
+        """Index an active game payload and mark every tracked participant as in that game."""
+        game_id = self.adapter.match_id(payload)
+        self.games[game_id] = payload
+        for participant_id in self.adapter.participant_ids(payload):
+            discord_user_id = self._by_id.get(participant_id)
+            if discord_user_id:
+                self.player_games[discord_user_id] = game_id
+
+    def _known_game(self, discord_user_id: str) -> Optional[Dict]:
+        game_id = self.player_games.get(discord_user_id)
+        if game_id:
+            self.calls_saved += 1
+            return self.games[game_id]
+        return None
+
+    async def get_current_match(self, discord_user_id: str, player_info: Dict, fetch) -> Optional[Dict]:
+        """Return the player's active game, calling `fetch()` only if no lobby-mate already answered."""
+        payload = self._known_game(discord_user_id)
+        if payload:
+            return payload
+
+        known_game_id = player_info.get("current_match_id") if player_info.get("in_match") else None
+        if known_game_id:
+            inflight = self._inflight.get(known_game_id)
+            if inflight:
+                # A lobby-mate is already checking the game we were last seen in
+                await asyncio.shield(inflight)
+            if known_game_id in self.games:
+                self.calls_saved += 1
+                payload = self.games[known_game_id]
+                if payload is None or discord_user_id in self.player_games:
+                    return payload
+            return await self._fetch(fetch, known_game_id)
+
+        if self._shares_lobbies and self._new_game_calls:
+            # A lobby-mate's call in flight may reveal this player's new game too, so
+            # wait for it once instead of racing it (e.g. a premade all starting at once)
+            await asyncio.wait(list(self._new_game_calls))
+            payload = self._known_game(discord_user_id)
+            if payload:
+                return payload
+        return await self._fetch(fetch)
+
+    async def _fetch(self, fetch, known_game_id: Optional[str] = None) -> Optional[Dict]:
+        """Call `fetch()` and index its answer. If it raises, nothing is recorded and lobby-mates fetch for themselves."""
+        future = asyncio.get_running_loop().create_future()
+        if known_game_id:
+            self._inflight[known_game_id] = future
+        else:
+            self._new_game_calls.add(future)
+        try:
+            payload = await fetch()
+            if payload:
+                self.add_game(payload)
+            elif known_game_id:
+                # Everyone in that lobby is out of the game now
+                self.games[known_game_id] = None
+            return payload
+        finally:
+            if known_game_id:
+                del self._inflight[known_game_id]
+            else:
+                self._new_game_calls.discard(future)
+            future.set_result(None)
+
+class GameTracker(LoopBound):
+    """Tracked players, guild routing and match detection for one game, polled by a TrackerEngine."""
+
+    def __init__(self, adapter: GameAdapter, engine: "TrackerEngine"):
+        self.adapter = adapter
+        self.engine = engine
+        self.game = adapter.game
+        self.store = engine.store
+        # Warm-load state persisted by previous runs so restarts don't re-resolve every player
+        self.tracked_players: Dict[str, Dict] = self.store.load(f"{self.game}:tracked_players")  # {discord_user_id: {riot_name, riot_tag, puuid, last_match_id, in_match, ...}}
+        self.discord_to_riot: Dict[str, Dict] = self.store.load(f"{self.game}:discord_to_riot")  # {discord_user_id: {riot_name, riot_tag}} - for auto-tracking
+        self.guilds = GuildRouter(self.game, self.store)  # Per-guild notification channels and tracked members
+        self.shards = None  # ShardCoordinator when players are split across tracker worker processes
+        self._owned: Set[str] = set()  # discord_user_ids this worker polled as of the last shard sync
+        self.presence_players: Set[str] = set()  # discord_user_ids we receive presence events for
+        self.match_end_timeout = 600  # Stop waiting for an ended game's stats after this many seconds
+        self._running = False
+
+    def _reset_loop_state(self):
+        # Monitoring started on an earlier event loop died with it
+        self._running = False
+
+    @property
+    def is_running(self) -> bool:
+        self._check_loop()
+        return self._running
+
+    def set_notification_channel(self, channel_id: int, guild_id: str):
+        """Set a guild's Discord channel ID for notifications."""
+        self.guilds.set_channel(guild_id, channel_id)
+
+    def link_discord_to_riot(self, discord_user_id: str, riot_name: str, riot_tag: str):
+        """Link a Discord user to their Riot account for auto-tracking."""
+        self.discord_to_riot[discord_user_id] = {
+            "riot_name": riot_name,
+            "riot_tag": riot_tag
+        }
+        self.store.put(f"{self.game}:discord_to_riot", discord_user_id, self.discord_to_riot[discord_user_id])
+        logger.info(f"Linked Discord user {discord_user_id} to {riot_name}#{riot_tag} ({self.adapter.label})")
+
+    def add_tracked_player(self, discord_user_id: str, riot_name: str, riot_tag: str, guild_id: str):
+        """Add a player to track, and to `guild_id`'s notifications.
+        
+        Players are only ever announced in guilds, so there is no tracking without one.
+        """
+        self.guilds.add_member(guild_id, discord_user_id)
+        existing = self.tracked_players.get(discord_user_id)
+        if existing and (existing["riot_name"], existing["riot_tag"]) == (riot_name, riot_tag):
+            # Already polled for another guild; keep its match state
+            return
+        self.tracked_players[discord_user_id] = {
+            "riot_name": riot_name,
+            "riot_tag": riot_tag,
+            "puuid": None,
+            "last_match_id": None,
+            "in_match": False,
+            "current_match_id": None,
+            "match_started_at": None,
+            "last_active": None,
+            "pending_match_end": None,
+            "pending_since": None,
+            **self.adapter.player_fields
+        }
+        self._save_player(discord_user_id)
+        self._poll_soon(discord_user_id)
+        logger.info(f"Added tracked player: {riot_name}#{riot_tag} (Discord: {discord_user_id}) - {self.adapter.label}")
+
+    def remove_tracked_player(self, discord_user_id: str, guild_id: Optional[str] = None):
+        """Remove a player from `guild_id`'s notifications, or from tracking altogether.
+
+        The player keeps being polled while any other guild still tracks them.
+        """
+        if guild_id is not None:
+            self.guilds.remove_member(guild_id, discord_user_id)
+            if self.guilds.guilds_of(discord_user_id):
+                logger.info(f"Removed tracked player {discord_user_id} from guild {guild_id} - {self.adapter.label}")
+                return
+        else:
+            self.guilds.remove_player(discord_user_id)
+        if discord_user_id in self.tracked_players:
+            del self.tracked_players[discord_user_id]
+            self.store.delete(f"{self.game}:tracked_players", discord_user_id)
+            self._forget_player(discord_user_id)
+            logger.info(f"Removed tracked player: {discord_user_id} - {self.adapter.label}")
+
+    def request_check(self, discord_user_id: str):
+        """Move a tracked player to the front of the poll queue (e.g. on a presence change)."""
+        if discord_user_id in self.tracked_players:
+            self._poll_soon(discord_user_id)
+
+    def on_game_presence(self, discord_user_id: str, playing: bool):
+        """Handle a Discord presence transition into (playing=True) or out of the game.
+
+        The player is checked right away, and from then on is only polled as a slow
+        reconciliation sweep, since their next transition will arrive as an event too.
+        """
+        self.presence_players.add(discord_user_id)
+        if discord_user_id in self.tracked_players:
+            logger.info(f"Presence: {discord_user_id} {'started' if playing else 'stopped'} playing {self.adapter.label}, checking now")
+            self._poll_soon(discord_user_id)
+
+    def _next_poll_delay(self, discord_user_id: str, player_info: Dict) -> float:
+        """Pick how long to wait before polling a player again, based on their activity."""
+        intervals = self.adapter.poll_intervals
+        now = time.time()
+        if player_info.get("pending_match_end"):
+            return intervals["match_end_retry"]
+        if player_info.get("in_match"):
+            started_at = player_info.get("match_started_at")
+            # Only poll closely once the game could actually be over. Presence doesn't
+            # reliably report the end of a game, so this applies to presence players too.
+            min_duration = self.adapter.min_match_duration
+            if started_at and now - started_at < min_duration:
+                remaining = min_duration - (now - started_at)
+                return max(self.engine.check_interval, min(remaining, intervals["in_match_early"]))
+            return self.engine.check_interval
+        if discord_user_id in self.presence_players:
+            # Presence events drive this player; polling only reconciles missed events
+            return intervals["reconcile"]
+
+        last_active = player_info.get("last_active")
+        if last_active and now - last_active < 3600:
+            return intervals["recent"]
+        if last_active and now - last_active < 86400:
+            return intervals["active"]
+        return intervals["dormant"]
+
+    def _reschedule(self, discord_user_ids: Iterable[str]):
+        """Schedule each player's next poll, keeping bumps that arrived while they were being checked."""
+        for discord_user_id in discord_user_ids:
+            player_info = self.tracked_players.get(discord_user_id)
+            key = (self.game, discord_user_id)
+            if player_info and key not in self.engine.scheduler:
+                self.engine.scheduler.schedule(key, self._next_poll_delay(discord_user_id, player_info))
+
+    def _forget_player(self, discord_user_id: str):
+        self.engine.scheduler.remove((self.game, discord_user_id))
+        self._owned.discard(discord_user_id)
+
+    def _poll_soon(self, discord_user_id: str):
+        self.engine.scheduler.bump((self.game, discord_user_id))
+
+    def attach_shards(self, shards):
+        """Only poll this worker's share of the players (see src/sharding.py)."""
+        self.shards = shards
+        shards.on_change(self.sync_from_store)
+
+    def owns(self, discord_user_id: str, player_info: Dict) -> bool:
+        """Whether this worker polls the player; always True without sharding."""
+        if self.shards is None:
+            return True
+        return self.shards.owns(player_info.get("puuid") or discord_user_id)
+
+    async def sync_from_store(self):
+        """Pick up players other workers added, removed or updated; newly owned players are polled right away."""
+        await self.store.flush()
+        stored = await self.store.reload(f"{self.game}:tracked_players", self.tracked_players)
+        for discord_user_id in list(self.tracked_players):
+            if discord_user_id not in stored:
+                del self.tracked_players[discord_user_id]
+                self._forget_player(discord_user_id)
+
+        owned = set()
+        for discord_user_id, player_info in stored.items():
+            if discord_user_id not in self._owned or discord_user_id not in self.tracked_players:
+                # Another worker polls (or polled) this player, so the stored state is the latest
+                self.tracked_players[discord_user_id] = player_info
+            if self.owns(discord_user_id, self.tracked_players[discord_user_id]):
+                owned.add(discord_user_id)
+                if discord_user_id not in self._owned:
+                    self._poll_soon(discord_user_id)
+        if owned != self._owned:
+            logger.info(f"Now polling {len(owned)} of {len(stored)} players on this worker - {self.adapter.label}")
+        self._owned = owned
+        self.discord_to_riot = await self.store.reload(f"{self.game}:discord_to_riot", self.discord_to_riot)
+        await self.guilds.sync_from_store()
+
+    def _save_player(self, discord_user_id: str):
+        """Queue a tracked player's current state for persistence."""
+        player_info = self.tracked_players.get(discord_user_id)
+        if player_info is not None:
+            self.store.put(f"{self.game}:tracked_players", discord_user_id, player_info)
+
+    async def _resolve_player(self, player_info: Dict) -> bool:
+        """Fill in the PUUID and game-specific IDs a player needs before they can be polled."""
+        if not player_info.get("puuid"):
+            puuid = await self.engine.get_player_puuid(player_info["riot_name"], player_info["riot_tag"])
+            if not puuid:
+                return False
+            player_info["puuid"] = puuid
+        return await self.adapter.resolve_player(player_info)
+
+    async def check_for_new_matches(self, discord_user_ids: Optional[List[str]] = None,
+                                    semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict]:
+        """Check tracked players (all, or just `discord_user_ids`) for new matches, polling them concurrently."""
+        semaphore = semaphore or asyncio.Semaphore(max(1, self.engine.max_concurrent_checks))
+        lobbies = LobbyIndex(self.tracked_players, self.adapter)
+
+        async def check_with_limit(discord_user_id: str, player_info: Dict) -> List[Dict]:
+            async with semaphore:
+                return await self._check_player(discord_user_id, player_info, lobbies)
+
+        # Snapshot the players so !track/!untrack during a cycle can't break iteration
+        if discord_user_ids is None:
+            players = list(self.tracked_players.items())
+        else:
+            players = [(uid, self.tracked_players[uid]) for uid in discord_user_ids if uid in self.tracked_players]
+        results = await asyncio.gather(*(
+            check_with_limit(discord_user_id, player_info)
+            for discord_user_id, player_info in players
+        ))
+
+        new_matches = []
+        for player_matches in results:
+            new_matches.extend(player_matches)
+
+        # Tracked players seen in someone else's game but not due yet join it in this
+        # cycle, so the whole lobby gets one combined notification
+        checked = {discord_user_id for discord_user_id, _ in players}
+        for discord_user_id, game_id in lobbies.player_games.items():
+            player_info = self.tracked_players.get(discord_user_id)
+            if (discord_user_id in checked or not player_info or player_info.get("in_match")
+                    or not self.owns(discord_user_id, player_info)):
+                continue
+            new_matches.append(self._enter_match(discord_user_id, player_info, lobbies.games[game_id]))
+            self._save_player(discord_user_id)
+            self.engine.scheduler.schedule((self.game, discord_user_id), self._next_poll_delay(discord_user_id, player_info))
+        if lobbies.calls_saved:
+            logger.info(f"Skipped {lobbies.calls_saved} active game calls for players sharing a lobby - {self.adapter.label}")
+        return new_matches
+
+    async def _check_player(self, discord_user_id: str, player_info: Dict, lobbies: Optional[LobbyIndex] = None) -> List[Dict]:
+        """Check a single tracked player for match start/end events."""
+        new_matches = []
+
+        try:
+            riot_name = player_info["riot_name"]
+            riot_tag = player_info["riot_tag"]
+
+            # Get PUUID (and game-specific IDs) if not cached
+            if not await self._resolve_player(player_info):
+                return new_matches
+
+            # First, try to get current active match (shared with lobby-mates this cycle).
+            # API errors raise, leaving the player's match state as it was until the next poll.
+            fetch = lambda: self.adapter.get_current_match(player_info)
+            if lobbies:
+                current_match = await lobbies.get_current_match(discord_user_id, player_info, fetch)
+            else:
+                current_match = await fetch()
+
+            if current_match:
+                # If player just entered a match
+                if not player_info.get("in_match", False):
+                    new_matches.append(self._enter_match(discord_user_id, player_info, current_match))
+            else:
+                # Player is not in a match anymore
+                if player_info.get("in_match", False):
+                    # Match just ended; its stats become available shortly after
+                    player_info["in_match"] = False
+                    player_info["match_started_at"] = None
+                    player_info["last_active"] = time.time()
+                    player_info["pending_match_end"] = player_info.get("current_match_id")
+                    player_info["pending_since"] = time.time()
+                    player_info["current_match_id"] = None
+
+                if player_info.get("pending_match_end"):
+                    ended_match = await self._check_match_end(discord_user_id, player_info)
+                    if ended_match:
+                        new_matches.append(ended_match)
+                else:
+                    missed = await self.adapter.find_missed_match(player_info)
+                    if missed:
+                        match_id, match_data = missed
+                        player_info["last_match_id"] = match_id
+                        player_info["last_active"] = time.time()
+                        new_matches.append({
+                            "discord_user_id": discord_user_id,
+                            "riot_name": riot_name,
+                            "riot_tag": riot_tag,
+                            "match_id": match_id,
+                            "match_data": match_data,
+                            "is_active": False
+                        })
+                        logger.info(f"New match detected for {riot_name}#{riot_tag}: {match_id} - {self.adapter.label}")
+
+        except Exception as e:
+            logger.error(f"Error checking matches for player {discord_user_id}: {str(e)} - {self.adapter.label}")
+
+        # Skip players removed (or re-added) while this check was in flight
+        if self.tracked_players.get(discord_user_id) is player_info:
+            self._save_player(discord_user_id)
+        return new_matches
+
+    def _enter_match(self, discord_user_id: str, player_info: Dict, current_match: Dict) -> Dict:
+        """Record that a player just entered a game and return its is_active event."""
+        match_id = self.adapter.match_id(current_match)
+        player_info["in_match"] = True
+        player_info["current_match_id"] = match_id
+        player_info["last_match_id"] = match_id
+        player_info["match_started_at"] = self.adapter.match_started_at(current_match) or time.time()
+        player_info["last_active"] = time.time()
+        logger.info(f"New active match detected for {player_info['riot_name']}#{player_info['riot_tag']}: {match_id} - {self.adapter.label}")
+        return {
+            "discord_user_id": discord_user_id,
+            "riot_name": player_info["riot_name"],
+            "riot_tag": player_info["riot_tag"],
+            "match_id": match_id,
+            "match_data": current_match,
+            "is_active": True
+        }
+
+    async def _check_match_end(self, discord_user_id: str, player_info: Dict) -> Optional[Dict]:
+        """Fetch the stats of a game that just ended, once they're available."""
+        game_id = player_info["pending_match_end"]
+        riot_name = player_info["riot_name"]
+        riot_tag = player_info["riot_tag"]
+
+        ended = await self.adapter.get_ended_match(player_info, game_id)
+        if ended:
+            match_id, match_details = ended
+            player_info["last_match_id"] = match_id
+            player_info["pending_match_end"] = None
+            logger.info(f"Match ended for {riot_name}#{riot_tag}: {match_id} - {self.adapter.label}")
+            return {
+                "discord_user_id": discord_user_id,
+                "riot_name": riot_name,
+                "riot_tag": riot_tag,
+                "match_id": match_id,
+                "match_data": match_details,
+                "is_active": False,
+                "match_ended": True
+            }
+
+        if time.time() - (player_info.get("pending_since") or 0) > self.match_end_timeout:
+            logger.warning(f"Stats for game {game_id} of {riot_name}#{riot_tag} never showed up, giving up - {self.adapter.label}")
+            player_info["pending_match_end"] = None
+        return None
+
+    async def start_monitoring(self, bot, check_interval: Optional[int] = None, max_concurrent_checks: Optional[int] = None):
+        """Start polling this game. Every game shares the engine's poll loop."""
+        if self.is_running:
+            logger.warning(f"{self.adapter.label} monitoring is already running")
+            return
+
+        self._running = True
+        if check_interval:
+            self.engine.check_interval = check_interval
+        if max_concurrent_checks:
+            self.engine.max_concurrent_checks = max_concurrent_checks
+        logger.info(
+            f"Starting {self.adapter.display_name} match monitoring "
+            f"(interval: {self.engine.check_interval}s, concurrency: {self.engine.max_concurrent_checks})"
+        )
+
+        # Resolve IDs for players not already resolved by a previous run
+        for discord_user_id, player_info in list(self.tracked_players.items()):
+            if not player_info.get("puuid") and self.owns(discord_user_id, player_info):
+                if await self._resolve_player(player_info):
+                    self._save_player(discord_user_id)
+
+        # Every player is due right away on startup; afterwards each is rescheduled by activity
+        for discord_user_id in self.tracked_players:
+            if (self.game, discord_user_id) not in self.engine.scheduler:
+                self._poll_soon(discord_user_id)
+
+        await self.engine.run(bot)
+
+    def _queue_notifications(self, bot, new_matches: List[Dict]):
+        """Fan new-match events out to each subscribed guild's channel via the send queue."""
+        display_name = self.adapter.display_name
+        # Players who entered the same game get one combined message per channel
+        active_groups: Dict[str, List[Dict]] = {}
+        ended_matches = []
+        started_matches = []
+        for match in new_matches:
+            if match.get("match_ended", False):
+                ended_matches.append(match)
+            elif match.get("is_active", False):
+                active_groups.setdefault(match["match_id"], []).append(match)
+            else:
+                started_matches.append(match)
+
+        # Matches ended - stats and AI comments are rendered once, then shared by every guild
+        if ended_matches:
+            rendered = notification_queue.prepare(lambda: self.render_match_end_notifications(ended_matches))
+            for channel_id, discord_user_ids in self.guilds.route(m["discord_user_id"] for m in ended_matches).items():
+                channel = resolve_channel(bot, channel_id)
+                if channel:
+                    notification_queue.enqueue(channel, self._messages_for(rendered, discord_user_ids))
+
+        for match_id, group in active_groups.items():
+            by_player = {m["discord_user_id"]: m for m in group}
+            for channel_id, discord_user_ids in self.guilds.route(by_player).items():
+                channel = resolve_channel(bot, channel_id)
+                if not channel:
+                    continue
+                members = [by_player[uid] for uid in discord_user_ids]
+                if len(members) > 1:
+                    names = ", ".join(f"**{m['riot_name']}#{m['riot_tag']}**" for m in members)
+                    message = f"🎮 {names} đang cùng nhau trong một trận đấu {display_name}!"
+                else:
+                    message = (
+                        f"🎮 **{members[0]['riot_name']}#{members[0]['riot_tag']}** "
+                        f"đang trong trận đấu {display_name}!"
+                    )
+                notification_queue.enqueue(channel, [message])
+                logger.info(f"Queued notification for {len(members)} player(s) in game {match_id} to channel {channel_id} - {self.adapter.label}")
+
+        for match in started_matches:
+            message = (
+                f"🎮 **{match['riot_name']}#{match['riot_tag']}** "
+                f"đã bắt đầu một trận đấu {display_name}!"
+            )
+            for channel_id in self.guilds.route([match["discord_user_id"]]):
+                channel = resolve_channel(bot, channel_id)
+                if channel:
+                    notification_queue.enqueue(channel, [message])
+                    logger.info(f"Queued notification for {match['riot_name']}#{match['riot_tag']} to channel {channel_id} - {self.adapter.label}")
+
+    @staticmethod
+    async def _messages_for(rendered: asyncio.Future, discord_user_ids: List[str]) -> List[str]:
+        """Pick one channel's share of a shared match end render."""
+        return [message for discord_user_id, message in await asyncio.shield(rendered)
+                if discord_user_id in discord_user_ids]
+
+    async def send_match_end_notification(self, channel, match: Dict, bot):
+        """Send match end notification with stats and AI comment."""
+        await self.send_match_end_notifications(channel, [match], bot)
+
+    async def send_match_end_notifications(self, channel, matches: List[Dict], bot):
+        """Queue stats for matches that ended to one channel; rendering and sending happen in the background."""
+        rendered = notification_queue.prepare(lambda: self.render_match_end_notifications(matches))
+        notification_queue.enqueue(channel, self._messages_for(rendered, [m["discord_user_id"] for m in matches]))
+
+    async def render_match_end_notifications(self, matches: List[Dict]) -> List[Tuple[str, str]]:
+        """Build the stats messages for ended matches, with all AI comments from one call.
+
+        Returns [(discord_user_id, message)] so each guild can pick its own players.
+        """
+        ended_message = "🎮 **{name}** đã kết thúc trận đấu " + self.adapter.display_name + "!"
+        messages = []
+        try:
+            # Parse stats
+            with_stats = []  # [(match, stats)]
+            for match in matches:
+                player_info = self.tracked_players.get(match["discord_user_id"])
+                if not player_info or not player_info.get("puuid"):
+                    continue
+                stats = self.adapter.parse_player_stats(match.get("match_data", {}), player_info["puuid"])
+                if stats:
+                    with_stats.append((match, stats))
+                else:
+                    messages.append((match["discord_user_id"], ended_message.format(name=f"{match['riot_name']}#{match['riot_tag']}")))
+            if not with_stats:
+                return messages
+
+            # Generate AI comments for everyone at once (e.g. a whole premade)
+            ai_comments = await self.adapter.generate_match_comments([
+                (stats, f"{match['riot_name']}#{match['riot_tag']}") for match, stats in with_stats
+            ])
+        except Exception as e:
+            logger.error(f"Error rendering match end notification: {str(e)} - {self.adapter.label}")
+            # Fallback to simple message
+            return [(match["discord_user_id"], ended_message.format(name=f"{match['riot_name']}#{match['riot_tag']}")) for match in matches]
+
+        # Combined messages, sent back to back
+        for (match, stats), ai_comment in zip(with_stats, ai_comments):
+            stats_message = self.adapter.format_match_stats(stats, f"{match['riot_name']}#{match['riot_tag']}")
+            messages.append((match["discord_user_id"], f"{stats_message}\n💬 **Nhận xét:** {ai_comment}"))
+            logger.info(f"Prepared match end stats for {match['riot_name']}#{match['riot_tag']} - {self.adapter.label}")
+        return messages
+
+    def stop_monitoring(self):
+        """Stop polling this game; the engine loop exits once no game is running."""
+        self._running = False
+        logger.info(f"Stopped {self.adapter.display_name} match monitoring")
+
+class TrackerEngine(LoopBound):
+    """Polls every registered game from one loop, with one scheduler and one concurrency limit.
+
+    Games plug in as GameAdapters. All Riot traffic goes through the shared
+    riot_http pool (so both games draw on the same rate-limit budget and match
+    cache), all state through tracker_store, and Riot ID lookups are cached
+    once for every game since PUUIDs are per account.
+    """
+
+    def __init__(self, store=tracker_store):
+        self.api_key = os.getenv("RIOT_API_KEY")
+        self.region = os.getenv("RIOT_REGION", "ap")
+        self.store = store
+        self.trackers: Dict[str, GameTracker] = {}  # {game: tracker}
+        self.scheduler = PollScheduler()  # Next-due poll time per (game, discord_user_id)
+        self.check_interval = 30  # Poll interval for players whose game may end any moment
+        self.max_concurrent_checks = int(os.getenv("RIOT_MAX_CONCURRENT_CHECKS", "8"))  # Players polled in parallel, across games
+        self._running = False
+        # Riot ID -> PUUID lookups; typo'd Riot IDs are remembered as misses
+        self.puuid_cache = TTLCache(ttl=6 * 3600, negative_ttl=600)
+
+    def _reset_loop_state(self):
+        # The poll loop died with the old event loop
+        self._running = False
+
+    @property
+    def is_running(self) -> bool:
+        self._check_loop()
+        return self._running
+
+    def register(self, adapter: GameAdapter) -> GameTracker:
+        """Add a game; its tracker is polled once its start_monitoring() is called."""
+        tracker = GameTracker(adapter, self)
+        self.trackers[adapter.game] = tracker
+        return tracker
+
+    async def get_player_puuid(self, riot_name: str, riot_tag: str) -> Optional[str]:
+        """Get player PUUID from Riot API (cached, including "not found" results)."""
+        if not self.api_key:
+            logger.warning("RIOT_API_KEY not set, cannot get player PUUID")
+            return None
+
+        try:
+            # Riot IDs are case-insensitive
+            cache_key = (riot_name.lower(), riot_tag.lower())
+            return await self.puuid_cache.get_or_fetch(
+                cache_key, lambda: self._fetch_player_puuid(riot_name, riot_tag)
+            )
+        except RiotAPIError:
+            # Already logged with details; not cached so the next cycle retries
+            pass
+        except Exception as e:
+            logger.error(f"Exception getting player PUUID: {str(e)}")
+
+        return None
+
+    async def _fetch_player_puuid(self, riot_name: str, riot_tag: str) -> Optional[str]:
+        """Fetch a PUUID. Returns None on 404, raises RiotAPIError on other failures."""
+        account_region = get_account_region(self.region)
+        response = await riot_http.get(account_region, f"/riot/account/v1/accounts/by-riot-id/{riot_name}/{riot_tag}", method="account-v1.by-riot-id")
+
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("puuid")
+        elif response.status_code == 404:
+            logger.warning(f"Player {riot_name}#{riot_tag} not found")
+            return None
+        elif response.status_code == 403:
+            logger.warning("Riot API key may not have access. Check your API key permissions.")
+        else:
+            logger.error(f"Error getting PUUID: {response.status_code} - {response.text}")
+        raise RiotAPIError(response.status_code, response.text)
+
+    async def run(self, bot):
+        """Poll due players of every running game until none is running. Returns at once if already polling."""
+        if self.is_running:
+            return
+        self._running = True
+        try:
+            while any(tracker.is_running for tracker in self.trackers.values()):
+                try:
+                    await self._poll_due(bot)
+                except Exception as e:
+                    logger.error(f"Error in tracker monitoring loop: {str(e)}")
+                    # Don't lose players that were popped from the queue before the error
+                    for tracker in self.trackers.values():
+                        for discord_user_id in list(tracker.tracked_players):
+                            if (tracker.game, discord_user_id) not in self.scheduler:
+                                self.scheduler.schedule((tracker.game, discord_user_id), self.check_interval)
+                    await asyncio.sleep(self.check_interval)
+        finally:
+            self._running = False
+
+    async def _poll_due(self, bot):
+        """Wait for the next due players, then check them all in one concurrent batch."""
+        await self.scheduler.wait(self.check_interval)
+        due: Dict[str, List[str]] = {}  # {game: [discord_user_id]}
+        for game, discord_user_id in self.scheduler.pop_due():
+            tracker = self.trackers.get(game)
+            # Players of stopped games are scheduled again when the game starts
+            if tracker is None or not tracker.is_running or discord_user_id not in tracker.tracked_players:
+                continue
+            if not tracker.owns(discord_user_id, tracker.tracked_players[discord_user_id]):
+                # Polled by another worker; looked at again after the next rebalance
+                self.scheduler.schedule((game, discord_user_id), tracker.adapter.poll_intervals["reconcile"])
+                continue
+            due.setdefault(game, []).append(discord_user_id)
+        if not due:
+            return
+
+        # One limit for every game, so adding a game doesn't double the parallel requests
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrent_checks))
+        results = await asyncio.gather(
+            *(self.trackers[game].check_for_new_matches(discord_user_ids, semaphore) for game, discord_user_ids in due.items()),
+            return_exceptions=True
+        )
+        for (game, discord_user_ids), new_matches in zip(due.items(), results):
+            tracker = self.trackers[game]
+            tracker._reschedule(discord_user_ids)
+            if isinstance(new_matches, BaseException):
+                logger.error(f"Error checking {tracker.adapter.label} matches: {str(new_matches)}")
+            elif new_matches:
+                # Send notifications for new matches to every guild tracking the players
+                tracker._queue_notifications(bot, new_matches)
+
+# Global engine shared by every game tracker
+tracker_engine = TrackerEngine()
@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+from src.tracker_store import tracker_store
+
+logger = logging.getLogger(__name__)
+
+class GuildRouter:
+    """Per-guild notification channels and tracked member sets for one game.
+
+    Players are polled once no matter how many guilds track them; this only
+    decides which channels hear about them. State lives in the tracker store
+    under "<game>:guild_channels" and "<game>:guild_members".
+    """
+
+    def __init__(self, game: str, store=tracker_store):
+        self.store = store
+        self._channels_ns = f"{game}:guild_channels"
+        self._members_ns = f"{game}:guild_members"
+        self.reload()
+
+    def reload(self):
+        """(Re)load channels and members from the store."""
+        self._set_state(self.store.load(self._channels_ns), self.store.load(self._members_ns))
+
+    async def sync_from_store(self):
+        """Pick up other workers' changes off the event loop, keeping this worker's unsaved ones."""
+        channels = await self.store.reload(self._channels_ns, self.channels)
+        members = await self.store.reload(
+            self._members_ns, {guild_id: sorted(member_ids) for guild_id, member_ids in self.members.items()}
+        )
+        self._set_state(channels, members)
+
+    def _set_state(self, channels: Dict[str, int], members: Dict[str, List[str]]):
+        self.channels: Dict[str, int] = channels  # {guild_id: channel_id}
+        self.members: Dict[str, Set[str]] = {
+            guild_id: set(member_ids) for guild_id, member_ids in members.items()
+        }  # {guild_id: {discord_user_id}}
+        # Reverse index so fan-out is a lookup per player, not a scan over every guild
+        self._guilds_by_player: Dict[str, Set[str]] = {}  # {discord_user_id: {guild_id}}
+        for guild_id, member_ids in self.members.items():
+            for discord_user_id in member_ids:
+                self._guilds_by_player.setdefault(discord_user_id, set()).add(guild_id)
+
+    def set_channel(self, guild_id: str, channel_id: int):
+        self.channels[guild_id] = channel_id
+        self.store.put(self._channels_ns, guild_id, channel_id)
+
+    def get_channel(self, guild_id: str) -> Optional[int]:
+        return self.channels.get(guild_id)
+
+    def add_member(self, guild_id: str, discord_user_id: str):
+        members = self.members.setdefault(guild_id, set())
+        if discord_user_id in members:
+            return
+        members.add(discord_user_id)
+        self._guilds_by_player.setdefault(discord_user_id, set()).add(guild_id)
+        self.store.put(self._members_ns, guild_id, sorted(members))
+
+    def remove_member(self, guild_id: str, discord_user_id: str):
+        members = self.members.get(guild_id)
+        if not members or discord_user_id not in members:
+            return
+        members.discard(discord_user_id)
+        guilds = self._guilds_by_player.get(discord_user_id, set())
+        guilds.discard(guild_id)
+        if not guilds:
+            self._guilds_by_player.pop(discord_user_id, None)
+        self.store.put(self._members_ns, guild_id, sorted(members))
+
+    def remove_player(self, discord_user_id: str):
+        """Drop a player from every guild."""
+        for guild_id in list(self.guilds_of(discord_user_id)):
+            self.remove_member(guild_id, discord_user_id)
+
+    def members_of(self, guild_id: str) -> Set[str]:
+        return self.members.get(guild_id, set())
+
+    def guilds_of(self, discord_user_id: str) -> Set[str]:
+        return self._guilds_by_player.get(discord_user_id, set())
+
+    def route(self, discord_user_ids: Iterable[str]) -> Dict[int, List[str]]:
+        """Group players by the notification channels that should hear about them.
+
+        Returns {channel_id: [discord_user_id]} covering every guild that tracks at
+        least one of the players and has a notification channel.
+        """
+        routes: Dict[int, List[str]] = {}
+        for discord_user_id in discord_user_ids:
+            for guild_id in self.guilds_of(discord_user_id):
+                channel_id = self.channels.get(guild_id)
+                if channel_id is not None:
+                    recipients = routes.setdefault(channel_id, [])
+                    if discord_user_id not in recipients:
+                        recipients.append(discord_user_id)
+        return routes
+
+def resolve_channel(bot, channel_id: int):
+    """Get a channel to send to, even if it belongs to a guild on another Discord shard."""
+    # Sharded bots only cache their own guilds; sending by ID works for any channel
+    return bot.get_channel(channel_id) or bot.get_partial_messageable(channel_id)
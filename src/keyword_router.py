@@ -0,0 +1,46 @@
+import re
+import logging
+from typing import Collection, Dict, List, Optional
+from src.utils import normalize_vietnamese
+
+logger = logging.getLogger(__name__)
+
+class KeywordRouter:
+    """Single-pass keyword matcher for the fast-path replies.
+
+    All rule keywords are compiled into one regex, so a message is scanned once
+    no matter how many rules exist; among the rules whose keywords occur in the
+    message, the one with the lowest priority number wins. Keywords match as
+    substrings of the normalized message, like the old `'tên' in message` checks.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = sorted(rules, key=lambda rule: rule["priority"])
+        self._keyword_rules: Dict[str, List[Dict]] = {}  # {normalized keyword: rules}
+        for rule in self.rules:
+            for keyword in rule["keywords"]:
+                self._keyword_rules.setdefault(normalize_vietnamese(keyword), []).append(rule)
+        # Longest first so "học đại học" is preferred over "đại học" at the same position;
+        # the lookahead lets matches overlap
+        alternatives = sorted(self._keyword_rules, key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in alternatives) + "))")
+        self.hits: Dict[str, int] = {rule["name"]: 0 for rule in self.rules}
+
+    def match(self, message: str, groups: Optional[Collection[str]] = None) -> Optional[str]:
+        """Return the response of the best matching rule (optionally only from `groups`), or None."""
+        text = normalize_vietnamese(message)
+        best = None
+        for found in self._pattern.finditer(text):
+            for rule in self._keyword_rules[found.group(1)]:
+                if groups is not None and rule["group"] not in groups:
+                    continue
+                if best is None or rule["priority"] < best["priority"]:
+                    best = rule
+        if best is None:
+            return None
+        self.hits[best["name"]] += 1
+        return best["response"]
+
+    def stats(self) -> Dict[str, int]:
+        """How many times each rule has fired, most used first."""
+        return dict(sorted(self.hits.items(), key=lambda item: item[1], reverse=True))
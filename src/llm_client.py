@@ -0,0 +1,166 @@
+import os
+import asyncio
+import logging
+import aiohttp
+from typing import AsyncIterator, Dict, List, Optional
+from dotenv import load_dotenv
+from src.loop_bound import LoopBound
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+GROQ_MODEL = "llama-3.1-8b-instant"  # Free and fast model
+HUGGINGFACE_MODEL = "vinai/PhoGPT-7B5-Instruct"  # Vietnamese model
+
+class LLMClient(LoopBound):
+    """Long-lived async clients for the LLM providers, shared by every caller.
+
+    Connections are reused across messages, every call has a hard deadline, and
+    callers can cancel a call (e.g. when the Discord message is deleted) without
+    blocking the event loop.
+    """
+
+    def __init__(self, groq_timeout: float = 15.0, huggingface_timeout: float = 30.0):
+        self.groq_timeout = float(os.getenv("GROQ_TIMEOUT", groq_timeout))
+        self.huggingface_timeout = float(os.getenv("HUGGINGFACE_TIMEOUT", huggingface_timeout))
+        self._groq = None
+        self._hf_session: Optional[aiohttp.ClientSession] = None
+
+    def _reset_loop_state(self):
+        # Clients bound to the old loop cannot be reused
+        self._groq = None
+        self._hf_session = None
+
+    def _get_groq(self):
+        """Get (or lazily create) the shared AsyncGroq client, or None if unavailable."""
+        self._check_loop()
+        if self._groq is None:
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                logger.warning("GROQ_API_KEY not found in environment variables")
+                return None
+            try:
+                from groq import AsyncGroq
+            except ImportError:
+                logger.warning("groq package not installed")
+                return None
+            # Retries are left to the caller so the deadline below stays meaningful
+            self._groq = AsyncGroq(api_key=api_key, timeout=self.groq_timeout, max_retries=0)
+        return self._groq
+
+    def _get_hf_session(self) -> aiohttp.ClientSession:
+        self._check_loop()
+        if self._hf_session is None or self._hf_session.closed:
+            headers = {}
+            api_key = os.getenv("HUGGINGFACE_API_KEY")
+            # If no API key, try without authentication (may have rate limits)
+            if api_key:
+                headers["Authorization"] = f"Bearer {api_key}"
+            self._hf_session = aiohttp.ClientSession(
+                base_url="https://api-inference.huggingface.co",
+                headers=headers,
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60)
+            )
+        return self._hf_session
+
+    async def groq_chat(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 500,
+                        timeout: Optional[float] = None, json_mode: bool = False) -> Optional[str]:
+        """Get a chat completion from Groq, or None on failure or timeout.
+
+        With `json_mode`, Groq is asked to return a single JSON object.
+        """
+        client = self._get_groq()
+        if client is None:
+            return None
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            response = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=GROQ_MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **extra
+                ),
+                timeout or self.groq_timeout
+            )
+            return response.choices[0].message.content.strip()
+        except asyncio.TimeoutError:
+            logger.warning(f"Groq API timed out after {timeout or self.groq_timeout}s")
+        except Exception as e:
+            logger.error(f"Error calling Groq API: {str(e)}")
+        return None
+
+    async def groq_chat_stream(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 500,
+                               timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream a chat completion from Groq, yielding text as it arrives.
+
+        The whole stream shares one deadline. Unlike groq_chat, errors are raised
+        so the caller can tell a finished answer from a cut-off one.
+        """
+        client = self._get_groq()
+        if client is None:
+            raise RuntimeError("Groq client unavailable")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.groq_timeout)
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            ),
+            deadline - loop.time()
+        )
+        async with stream:
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    return
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def huggingface_generate(self, prompt: str, max_new_tokens: int = 200, temperature: float = 0.7,
+                                   timeout: Optional[float] = None) -> Optional[str]:
+        """Generate text with the Hugging Face Inference API, or None on failure or timeout."""
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": max_new_tokens,
+                "temperature": temperature,
+                "return_full_text": False
+            }
+        }
+        try:
+            session = self._get_hf_session()
+            request_timeout = aiohttp.ClientTimeout(total=timeout or self.huggingface_timeout)
+            async with session.post(f"/models/{HUGGINGFACE_MODEL}", json=payload, timeout=request_timeout) as response:
+                if response.status != 200:
+                    logger.warning(f"Hugging Face API returned status {response.status}")
+                    return None
+                result = await response.json(content_type=None)
+            if isinstance(result, list) and len(result) > 0:
+                return result[0].get("generated_text", "").strip()
+            elif isinstance(result, dict):
+                return result.get("generated_text", "").strip()
+        except asyncio.TimeoutError:
+            logger.warning(f"Hugging Face API timed out after {timeout or self.huggingface_timeout}s")
+        except Exception as e:
+            logger.error(f"Error calling Hugging Face API: {str(e)}")
+        return None
+
+    async def close(self):
+        """Close the pooled provider connections."""
+        self._check_loop()
+        if self._groq is not None:
+            await self._groq.close()
+            self._groq = None
+        if self._hf_session is not None and not self._hf_session.closed:
+            await self._hf_session.close()
+        self._hf_session = None
+
+# Global client shared by chat replies and match commentary
+llm_client = LLMClient()
@@ -0,0 +1,126 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Skips a provider after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds one trial call is let through (half-open); its
+    outcome closes the breaker again or re-opens it for another timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Half-open: let one call through, re-arm the timeout for the rest
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class Provider:
+    """An LLM provider call plus its latency history and circuit breaker."""
+
+    def __init__(self, name: str, call: Callable[..., Awaitable[Optional[str]]],
+                 default_hedge_delay: float = 3.0, window: int = 50):
+        self.name = name
+        self.call = call
+        self.default_hedge_delay = default_hedge_delay
+        self.latencies = deque(maxlen=window)  # Seconds, successful calls only
+        self.breaker = CircuitBreaker()
+
+    def hedge_delay(self, min_delay: float = 0.5, max_delay: float = 8.0) -> float:
+        """How long to wait for this provider before hedging: its p95 latency."""
+        if len(self.latencies) < 5:
+            return self.default_hedge_delay
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(max_delay, max(min_delay, p95))
+
+class ProviderRouter:
+    """Routes a request across providers in priority order with hedging.
+
+    The first provider starts immediately. If it hasn't answered within its p95
+    latency (or fails), the next one starts too; the first usable answer wins and
+    the rest are cancelled. Providers whose circuit breaker is open are skipped.
+    """
+
+    def __init__(self, providers: List[Provider]):
+        self.providers = providers
+
+    async def _call(self, provider: Provider, *args: Any) -> Optional[str]:
+        started = time.monotonic()
+        try:
+            result = await provider.call(*args)
+        except Exception as e:
+            logger.error(f"Provider {provider.name} raised: {str(e)}")
+            result = None
+        if result:
+            provider.latencies.append(time.monotonic() - started)
+            provider.breaker.record_success()
+        else:
+            provider.breaker.record_failure()
+        return result
+
+    async def complete(self, *args: Any) -> Optional[str]:
+        """Call the providers with `args` and return the first non-empty answer, or None."""
+        candidates = [provider for provider in self.providers if provider.breaker.allow()]
+        if not candidates:
+            logger.warning("All LLM providers are failing, skipping request")
+            return None
+
+        running: Dict[asyncio.Task, Provider] = {}
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            running[asyncio.ensure_future(self._call(provider, *args))] = provider
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if next_index < len(candidates):
+                    timeout = candidates[next_index - 1].hedge_delay()
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    logger.info(f"{candidates[next_index - 1].name} is slow, hedging with {candidates[next_index].name}")
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    result = task.result()
+                    if result:
+                        return result
+                    logger.info(f"Provider {provider.name} failed")
+
+                # Everything in flight failed; fall through to the next provider now
+                if not running and next_index < len(candidates):
+                    launch()
+            return None
+        finally:
+            for task in running:
+                task.cancel()
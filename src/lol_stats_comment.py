@@ -1,16 +1,21 @@
 import os
 import logging
-from typing import Dict, Optional
-from src.ai_handler import try_groq_api
+from typing import Dict, List, Tuple
+from src.batch_comment import generate_comments
 
 logger = logging.getLogger(__name__)
 
-async def generate_match_comment(stats: Dict, player_name: str) -> str:
-    """Generate an AI comment in Vietnamese based on League of Legends match stats."""
-    if not stats:
-        return "Không có dữ liệu để phân tích."
-    
-    # Build stats summary for AI
+SYSTEM_PROMPT = """Bạn là một người bạn thân thiết, hài hước và châm biếm. Bạn đang xem thống kê trận đấu League of Legends của một người bạn và đưa ra nhận xét ngắn gọn, vui vẻ bằng tiếng Việt. Hãy:
+- Đưa ra nhận xét dựa trên thống kê (KDA, damage, CS, multi-kills, v.v.)
+- Nếu thắng và chơi tốt: khen ngợi nhưng đừng quá nghiêm túc, có thể châm biếm nhẹ
+- Nếu thua hoặc chơi kém: động viên một cách hài hước, có thể châm biếm nhẹ nhàng
+- Nếu có Penta/Quadra kill: đặc biệt khen ngợi
+- Giữ tông điệu trẻ trung, vui vẻ, như một người bạn đang xem highlight
+- Chỉ viết 1-2 câu ngắn gọn
+- Không quá dài dòng"""
+
+def build_stats_summary(stats: Dict, player_name: str) -> str:
+    """Stats of one player's League of Legends match, as text for the AI."""
     multi_kills = []
     if stats["penta_kills"] > 0:
         multi_kills.append(f"{stats['penta_kills']} Penta")
@@ -22,7 +27,7 @@ async def generate_match_comment(stats: Dict, player_name: str) -> str:
     minutes = stats["game_duration"] // 60
     seconds = stats["game_duration"] % 60
     
-    stats_summary = f"""
+    return f"""
 Thống kê trận đấu League of Legends của {player_name}:
 - Kết quả: {'THẮNG' if stats['won'] else 'THUA'} (Thời gian: {minutes}:{seconds:02d})
 - K/D/A: {stats['kills']}/{stats['deaths']}/{stats['assists']} (KDA ratio: {stats['kda_ratio']})
@@ -34,39 +39,12 @@ Thống kê trận đấu League of Legends của {player_name}:
 - Vision Score: {stats['vision_score']}
 - Multi-kills: {', '.join(multi_kills) if multi_kills else 'Không có'}
 """
-    
-    # Determine performance level
+
+def fallback_comment(stats: Dict) -> str:
+    """Rule-based comment, used when the AI is unavailable."""
     kda = stats['kda_ratio']
-    kills = stats['kills']
     won = stats['won']
-    damage = stats['damage_dealt']
-    
-    performance = "xuất sắc" if kda >= 3.0 and kills >= 10 else \
-                  "rất tốt" if kda >= 2.5 and kills >= 8 else \
-                  "tốt" if kda >= 2.0 and kills >= 5 else \
-                  "ổn" if kda >= 1.5 else \
-                  "cần cải thiện"
     
-    # Build prompt for AI
-    system_prompt = """Bạn là một người bạn thân thiết, hài hước và châm biếm. Bạn đang xem thống kê trận đấu League of Legends của một người bạn và đưa ra nhận xét ngắn gọn, vui vẻ bằng tiếng Việt. Hãy:
-- Đưa ra nhận xét dựa trên thống kê (KDA, damage, CS, multi-kills, v.v.)
-- Nếu thắng và chơi tốt: khen ngợi nhưng đừng quá nghiêm túc, có thể châm biếm nhẹ
-- Nếu thua hoặc chơi kém: động viên một cách hài hước, có thể châm biếm nhẹ nhàng
-- Nếu có Penta/Quadra kill: đặc biệt khen ngợi
-- Giữ tông điệu trẻ trung, vui vẻ, như một người bạn đang xem highlight
-- Chỉ viết 1-2 câu ngắn gọn
-- Không quá dài dòng"""
-    
-    user_message = f"{stats_summary}\nHãy đưa ra một nhận xét ngắn gọn và hài hước về trận đấu này:"
-    
-    try:
-        comment = await try_groq_api(system_prompt, user_message, "")
-        if comment:
-            return comment.strip()
-    except Exception as e:
-        logger.error(f"Error generating AI comment: {str(e)}")
-    
-    # Fallback to simple comment
     if won:
         if stats["penta_kills"] > 0:
             return f"🔥🔥🔥 PENTAKILL! Chơi như một vị thần! KDA {kda} là level pro rồi!"
@@ -86,3 +64,14 @@ Thống kê trận đấu League of Legends của {player_name}:
         else:
             return f"🤝 Thua nhưng chơi ổn! KDA {kda} không tệ đâu!"
 
+async def generate_match_comment(stats: Dict, player_name: str) -> str:
+    """Generate an AI comment in Vietnamese based on League of Legends match stats."""
+    if not stats:
+        return "Không có dữ liệu để phân tích."
+    return (await generate_match_comments([(stats, player_name)]))[0]
+
+async def generate_match_comments(players: List[Tuple[Dict, str]]) -> List[str]:
+    """Generate comments for several players' matches with one AI call. Takes [(stats, player_name)]."""
+    summaries = [build_stats_summary(stats, player_name) for stats, player_name in players]
+    fallbacks = [fallback_comment(stats) for stats, _ in players]
+    return await generate_comments(SYSTEM_PROMPT, summaries, fallbacks)
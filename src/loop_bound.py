@@ -0,0 +1,24 @@
+import asyncio
+from typing import Optional
+
+class LoopBound:
+    """Base for objects holding asyncio state (sessions, locks, tasks) tied to one event loop.
+
+    bot.run() creates a fresh event loop on every reconnect, and anything bound to
+    the old loop can't be used on the new one. Subclasses put that state in
+    _reset_loop_state() and call _check_loop() before touching it.
+    """
+
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _check_loop(self) -> bool:
+        """Reset the loop-bound state when running on a new event loop. Returns True if it was reset."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return False
+        self._reset_loop_state()
+        self._loop = loop
+        return True
+
+    def _reset_loop_state(self):
+        raise NotImplementedError
@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+import aiohttp
+import discord
+from src.rate_limiter import TokenBucket
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+# Messages to send, a coroutine function that builds them (e.g. waits for AI comments),
+# or an awaitable of them (e.g. one guild's share of a prepare()d render)
+Render = Union[List[str], Callable[[], Awaitable[List[str]]], Awaitable[List[str]]]
+
+class NotificationQueue(LoopBound):
+    """Outbound pipeline for tracker notifications, so polling never waits on Discord or the LLM.
+
+    Pollers enqueue notifications and return immediately. Rendering starts right
+    away, up to `max_renders` at a time. One sender task per channel then delivers
+    that channel's notifications in the order they were enqueued, which keeps each
+    player's start/end messages in order. Sends are paced to Discord's per-channel
+    limit (5 messages per 5 seconds) and retried with exponential backoff on 429s,
+    5xx errors and network failures.
+    """
+
+    def __init__(self, channel_limit: Tuple[int, int] = (5, 5), max_renders: int = 4,
+                 max_retries: int = 4, base_backoff: float = 1.0):
+        self.channel_limit = channel_limit
+        self.max_renders = max_renders
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self._pending: Dict[int, Deque[Tuple[object, asyncio.Future]]] = {}  # {channel_id: [(channel, rendering)]}
+        self._senders: Dict[int, asyncio.Task] = {}  # {channel_id: sender task}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._render_semaphore: Optional[asyncio.Semaphore] = None
+
+    def _reset_loop_state(self):
+        # Work queued on the old loop died with it
+        self._pending = {}
+        self._senders = {}
+        self._render_semaphore = asyncio.Semaphore(self.max_renders)
+
+    def enqueue(self, channel, render: Render):
+        """Queue messages for `channel`. Returns immediately."""
+        self._check_loop()
+        rendering = asyncio.ensure_future(self._render(render))
+        self._pending.setdefault(channel.id, deque()).append((channel, rendering))
+        sender = self._senders.get(channel.id)
+        if sender is None or sender.done():
+            self._senders[channel.id] = asyncio.ensure_future(self._send_pending(channel.id))
+
+    def prepare(self, render: Callable[[], Awaitable]) -> asyncio.Future:
+        """Start a render now, within the `max_renders` limit, so several channels can share it."""
+        self._check_loop()
+        return asyncio.ensure_future(self._render(render))
+
+    async def _render(self, render: Render):
+        if isinstance(render, list):
+            return render
+        if not callable(render):
+            # Already-running work (its own renders went through prepare())
+            return await render
+        async with self._render_semaphore:
+            return await render()
+
+    async def _send_pending(self, channel_id: int):
+        queue = self._pending[channel_id]
+        try:
+            while queue:
+                channel, rendering = queue[0]
+                try:
+                    messages = await rendering
+                except Exception as e:
+                    logger.error(f"Error rendering notification for channel {channel_id}: {str(e)}")
+                    messages = []
+                for content in messages:
+                    await self._send(channel, content)
+                queue.popleft()
+        finally:
+            if not queue:
+                self._pending.pop(channel_id, None)
+            self._senders.pop(channel_id, None)
+
+    async def _send(self, channel, content: str):
+        bucket = self._buckets.get(channel.id)
+        if bucket is None:
+            bucket = self._buckets[channel.id] = TokenBucket(*self.channel_limit)
+
+        for attempt in range(self.max_retries + 1):
+            wait = bucket.wait_time(time.monotonic())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            bucket.consume()
+            try:
+                await channel.send(content)
+                return
+            except (discord.Forbidden, discord.NotFound) as e:
+                logger.error(f"Cannot send to channel {channel.id}, dropping notification: {str(e)}")
+                return
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    logger.error(f"Discord rejected notification for channel {channel.id}: {str(e)}")
+                    return
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                error = e
+
+            if attempt < self.max_retries:
+                backoff = self.base_backoff * 2 ** attempt
+                logger.warning(f"Send to channel {channel.id} failed ({str(error)}), retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+        logger.error(f"Giving up on notification for channel {channel.id} after {self.max_retries + 1} attempts")
+
+    async def drain(self):
+        """Wait until everything queued so far has been delivered."""
+        self._check_loop()
+        while self._senders:
+            await asyncio.gather(*list(self._senders.values()), return_exceptions=True)
+
+# Global queue shared by the trackers
+notification_queue = NotificationQueue(
+    max_renders=int(os.getenv("NOTIFICATION_MAX_RENDERS", "4"))
+)
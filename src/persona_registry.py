@@ -0,0 +1,83 @@
+import os
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Resolved from the repo root so the bot works from any working directory
+PERSONAS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "personas.json")
+
+DEFAULT_FAST_PATHS = ["personal", "special"]
+
+class Persona:
+    """How the bot talks to one regular: reply prefix, keyword fast-paths and extra prompt."""
+
+    def __init__(self, name: str, prefix: str = "", fast_paths: Optional[List[str]] = None,
+                 system_prompt: Optional[str] = None):
+        self.name = name
+        self.prefix = prefix
+        self.fast_paths = list(DEFAULT_FAST_PATHS if fast_paths is None else fast_paths)
+        self.system_prompt = system_prompt
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Persona":
+        return cls(
+            name=data["name"],
+            prefix=data.get("prefix", ""),
+            fast_paths=data.get("fast_paths"),
+            system_prompt=data.get("system_prompt")
+        )
+
+class PersonaRegistry:
+    """Personas loaded from personas.json, looked up by Discord user ID.
+
+    Entries may also list `display_names` as a fallback for users whose ID hasn't
+    been filled in yet; the ID is preferred since it survives nickname changes.
+    """
+
+    def __init__(self, path: str = PERSONAS_PATH):
+        self.path = path
+        self._by_id: Dict[str, Persona] = {}
+        self._by_display_name: Dict[str, Persona] = {}
+        self._loaded = False
+
+    def load(self) -> int:
+        """(Re)load personas from the config file. Returns how many were loaded."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get("personas", [])
+        except FileNotFoundError:
+            logger.warning(f"{os.path.basename(self.path)} not found, no personas loaded")
+            entries = []
+
+        by_id = {}
+        by_display_name = {}
+        for entry in entries:
+            persona = Persona.from_dict(entry)
+            for user_id in entry.get("user_ids", []):
+                by_id[str(user_id)] = persona
+            for display_name in entry.get("display_names", []):
+                by_display_name[display_name] = persona
+
+        # Swap in one go so lookups never see a half-loaded registry
+        self._by_id = by_id
+        self._by_display_name = by_display_name
+        self._loaded = True
+        logger.info(f"Loaded {len(entries)} personas from {os.path.basename(self.path)}")
+        return len(entries)
+
+    def get(self, user_id=None, display_name: Optional[str] = None) -> Optional[Persona]:
+        """Get the persona for a user, or None for regular users."""
+        if not self._loaded:
+            self.load()
+        if user_id is not None:
+            persona = self._by_id.get(str(user_id))
+            if persona is not None:
+                return persona
+        if display_name is not None:
+            return self._by_display_name.get(display_name)
+        return None
+
+# Global registry
+persona_registry = PersonaRegistry()
@@ -0,0 +1,85 @@
+import time
+import heapq
+import asyncio
+import logging
+from typing import Dict, Hashable, List, Optional, Tuple
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+class PollScheduler(LoopBound):
+    """Priority queue of keys ordered by their next-due poll time.
+
+    Rescheduling a key just pushes a new heap entry; stale entries are skipped
+    when popped (lazy deletion), so every operation stays O(log n).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []  # [(due_at, seq, key)]
+        self._due: Dict[Hashable, float] = {}  # {key: current due_at}
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _reset_loop_state(self):
+        self._wakeup = asyncio.Event()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._due
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, key: Hashable, delay: float):
+        """(Re)schedule `key` to be due in `delay` seconds."""
+        due_at = time.monotonic() + max(0.0, delay)
+        self._due[key] = due_at
+        self._seq += 1
+        heapq.heappush(self._heap, (due_at, self._seq, key))
+
+    def bump(self, key: Hashable):
+        """Move `key` to the front of the queue and wake the poll loop."""
+        self.schedule(key, 0)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def remove(self, key: Hashable):
+        self._due.pop(key, None)
+
+    def _drop_stale(self):
+        while self._heap:
+            due_at, _, key = self._heap[0]
+            if self._due.get(key) == due_at:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self) -> List[Hashable]:
+        """Remove and return every key whose due time has passed."""
+        now = time.monotonic()
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key = heapq.heappop(self._heap)
+            del self._due[key]
+            due.append(key)
+            self._drop_stale()
+        return due
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Seconds until the earliest key is due, or None if nothing is scheduled."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    async def wait(self, max_wait: float):
+        """Sleep until the next key is due, a bump() arrives, or `max_wait` elapses."""
+        self._check_loop()
+        timeout = self.seconds_until_next()
+        timeout = max_wait if timeout is None else min(timeout, max_wait)
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
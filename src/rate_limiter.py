@@ -0,0 +1,161 @@
+import time
+import asyncio
+import logging
+from typing import Dict, List, Mapping, Optional, Tuple
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+# Development key limits, used until Riot tells us the real ones via headers
+DEFAULT_APP_LIMITS = "20:1,100:120"
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, int]]:
+    """Parse a Riot rate limit header like "20:1,100:120" into [(20, 1), (100, 120)]."""
+    limits = []
+    if not value:
+        return limits
+    for part in value.split(","):
+        try:
+            amount, window = part.strip().split(":")
+            limits.append((int(amount), int(window)))
+        except ValueError:
+            logger.warning(f"Could not parse rate limit header part: {part}")
+    return limits
+
+class TokenBucket:
+    """Token bucket holding `limit` tokens refilled evenly over `window` seconds."""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(float(self.limit), self.tokens + elapsed * self.limit / self.window)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.window / self.limit
+
+    def consume(self):
+        self.tokens -= 1
+
+    def sync(self, count: int):
+        """Align with the usage count reported by Riot for this window."""
+        self.tokens = min(self.tokens, float(self.limit - count))
+
+class RiotRateLimiter(LoopBound):
+    """Schedules Riot API requests against app-level and per-method rate limits.
+
+    App limits apply per routing host, method limits per host and endpoint. Requests
+    for the same endpoint queue up in FIFO order instead of being fired and
+    rejected, and a 429's Retry-After blocks the offending scope until it expires.
+
+    When several processes share the API key, each gets `share` of every limit
+    (see set_share), while usage counts from Riot still reflect the whole key.
+    """
+
+    def __init__(self, app_limits: str = DEFAULT_APP_LIMITS):
+        self.default_app_limits = parse_rate_limit_header(app_limits)
+        self.share = 1.0  # Fraction of the key's limits this process may use
+        self._limits: Dict[str, List[Tuple[int, int]]] = {}  # {scope_key: full limits for the key}
+        self._buckets: Dict[str, List[TokenBucket]] = {}  # {scope_key: buckets}
+        self._blocked_until: Dict[str, float] = {}  # {scope_key: monotonic deadline}
+        self._locks: Dict[str, asyncio.Lock] = {}  # {method_key: lock}
+
+    def _reset_loop_state(self):
+        self._locks = {}
+
+    @staticmethod
+    def _app_key(host: str) -> str:
+        return f"app:{host}"
+
+    @staticmethod
+    def _method_key(host: str, method: str) -> str:
+        return f"method:{host}:{method}"
+
+    def _get_lock(self, key: str) -> asyncio.Lock:
+        self._check_loop()
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _configure(self, key: str, limits: List[Tuple[int, int]]):
+        """Create or replace the buckets for a scope if its limits changed."""
+        self._limits[key] = limits
+        scaled = [(max(1, int(limit * self.share)), window) for limit, window in limits]
+        current = self._buckets.get(key)
+        if current is not None and [(b.limit, b.window) for b in current] == scaled:
+            return
+        self._buckets[key] = [TokenBucket(limit, window) for limit, window in scaled]
+
+    def set_share(self, share: float):
+        """Use only `share` (0-1] of the key's limits, e.g. 1/N with N worker processes."""
+        if share == self.share:
+            return
+        self.share = share
+        for key, limits in list(self._limits.items()):
+            self._configure(key, limits)
+        logger.info(f"Riot rate limit share set to {share:.2f}")
+
+    async def acquire(self, host: str, method: str):
+        """Wait until a request to `method` on `host` fits every applicable limit."""
+        app_key = self._app_key(host)
+        method_key = self._method_key(host, method)
+        if app_key not in self._buckets:
+            self._configure(app_key, self.default_app_limits)
+
+        async with self._get_lock(method_key):
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                for key in (app_key, method_key):
+                    wait = max(wait, self._blocked_until.get(key, 0.0) - now)
+                    for bucket in self._buckets.get(key, []):
+                        wait = max(wait, bucket.wait_time(now))
+                if wait <= 0:
+                    for key in (app_key, method_key):
+                        for bucket in self._buckets.get(key, []):
+                            bucket.consume()
+                    return
+                await asyncio.sleep(wait)
+
+    def update(self, host: str, method: str, status: int, headers: Mapping[str, str]) -> float:
+        """Learn limits and usage from response headers. Returns Retry-After seconds for a 429, else 0."""
+        app_key = self._app_key(host)
+        method_key = self._method_key(host, method)
+
+        for key, limit_header in ((app_key, "X-App-Rate-Limit"), (method_key, "X-Method-Rate-Limit")):
+            limits = parse_rate_limit_header(headers.get(limit_header))
+            if not limits:
+                continue
+            self._configure(key, limits)
+            counts = dict((window, count) for count, window in parse_rate_limit_header(headers.get(f"{limit_header}-Count")))
+            full_limits = dict((window, limit) for limit, window in limits)
+            for bucket in self._buckets[key]:
+                if bucket.window in counts:
+                    # Counts cover every process using the key, so compare them with the full limit
+                    bucket.sync(counts[bucket.window] - (full_limits[bucket.window] - bucket.limit))
+
+        if status != 429:
+            return 0.0
+
+        try:
+            retry_after = float(headers.get("Retry-After", 1))
+        except ValueError:
+            retry_after = 1.0
+        limit_type = headers.get("X-Rate-Limit-Type", "service")
+        # Application limits block the whole host; method and service limits only the endpoint
+        blocked_key = app_key if limit_type == "application" else method_key
+        self._blocked_until[blocked_key] = max(
+            self._blocked_until.get(blocked_key, 0.0),
+            time.monotonic() + retry_after
+        )
+        logger.warning(f"Riot rate limit hit ({limit_type}) on {host} {method}, retrying after {retry_after}s")
+        return retry_after
@@ -0,0 +1,68 @@
+import os
+import time
+import random
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from src.utils import normalize_vietnamese
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """LRU cache of AI replies keyed by normalized prompt, with a TTL per entry.
+
+    With vary > 1, each prompt keeps a pool of up to `vary` different answers: the
+    first `vary` asks still go to the LLM to fill the pool, later ones get a random
+    answer from it, so repeated questions don't always get the identical reply.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: float = 3600.0, vary: int = 1):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.vary = max(1, vary)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[str], float]]" = OrderedDict()  # {key: (answers, expires_at)}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(system_prompt: str, prompt: str) -> Tuple[str, str]:
+        # Keyed on the system prompt too, so editing prompts.txt invalidates old answers
+        return system_prompt, normalize_vietnamese(prompt)
+
+    def get(self, system_prompt: str, prompt: str) -> Optional[str]:
+        """Return a cached answer, or None if the LLM should be asked."""
+        key = self._key(system_prompt, prompt)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None or len(entry[0]) < self.vary:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return random.choice(entry[0])
+
+    def put(self, system_prompt: str, prompt: str, answer: str):
+        """Add an answer to the prompt's pool."""
+        key = self._key(system_prompt, prompt)
+        if not key[1]:
+            return
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = ([], time.monotonic() + self.ttl)
+            self._entries[key] = entry
+        answers = entry[0]
+        # Duplicates are kept so a model that keeps repeating itself still fills the pool
+        if len(answers) < self.vary:
+            answers.append(answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+# Shared cache for chat replies
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "500")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    vary=int(os.getenv("RESPONSE_CACHE_VARY", "1"))
+)
@@ -0,0 +1,100 @@
+import os
+import json
+import logging
+import aiohttp
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from src.rate_limiter import RiotRateLimiter, DEFAULT_APP_LIMITS
+from src.loop_bound import LoopBound
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+class RiotAPIError(Exception):
+    """Raised for Riot API failures that should not be cached as "not found"."""
+
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(f"Riot API error {status_code}: {message[:100]}")
+        self.status_code = status_code
+
+class RiotResponse:
+    """Minimal response object mirroring the parts of requests.Response the trackers use."""
+
+    def __init__(self, status_code: int, text: str, headers: Dict[str, str], content: bytes = b""):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.content = content  # Raw body bytes
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+class RiotHTTPClient(LoopBound):
+    """Shared async HTTP client for the Riot Games API.
+
+    Keeps one keep-alive connection pool per routing host (americas, asia, europe)
+    and platform host (kr, vn2, na1, ...) so polling never blocks the event loop
+    and does not pay a TLS handshake per request.
+    """
+
+    def __init__(self, timeout: int = 10, connections_per_host: int = 10, max_retries: int = 2):
+        self.api_key = os.getenv("RIOT_API_KEY")
+        self.timeout = timeout
+        self.connections_per_host = connections_per_host
+        self.max_retries = max_retries  # Retries after a 429, once Retry-After has elapsed
+        self.rate_limiter = RiotRateLimiter(os.getenv("RIOT_APP_RATE_LIMIT", DEFAULT_APP_LIMITS))
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}  # {host: session}
+
+    def _reset_loop_state(self):
+        # Sessions bound to the old loop cannot be reused
+        self._sessions = {}
+
+    def _get_session(self, host: str) -> aiohttp.ClientSession:
+        """Get (or lazily create) the pooled session for a Riot host."""
+        self._check_loop()
+
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connections_per_host,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                base_url=f"https://{host}.api.riotgames.com",
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"X-Riot-Token": self.api_key or ""}
+            )
+            self._sessions[host] = session
+        return session
+
+    async def get(self, host: str, path: str, params: Optional[Dict] = None, method: Optional[str] = None) -> RiotResponse:
+        """Send a rate-limited GET request to https://{host}.api.riotgames.com{path}.
+
+        `method` names the Riot endpoint for per-method rate limits (defaults to the path).
+        """
+        method = method or path
+        session = self._get_session(host)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(host, method)
+            async with session.get(path, params=params) as response:
+                content = await response.read()
+                text = content.decode(response.get_encoding(), errors="replace")
+                self.rate_limiter.update(host, method, response.status, response.headers)
+                result = RiotResponse(response.status, text, dict(response.headers), content)
+            if result.status_code != 429:
+                break
+        return result
+
+    async def close(self):
+        """Close every pooled session."""
+        self._check_loop()
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions = {}
+        logger.info("Closed Riot HTTP sessions")
+
+# Global client shared by all trackers
+riot_http = RiotHTTPClient()
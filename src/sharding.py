@@ -0,0 +1,128 @@
+import os
+import time
+import atexit
+import bisect
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Union
+from src.tracker_store import tracker_store
+from src.riot_http import riot_http
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+def _hash(value: str) -> int:
+    # Stable across processes and restarts, unlike hash()
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """Consistent hash ring: adding or removing a worker only moves ~1/N of the keys."""
+
+    def __init__(self, nodes: List[str], vnodes: int = 64):
+        self.nodes = sorted(nodes)
+        self._points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in self._points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+class ShardCoordinator(LoopBound):
+    """Splits tracked players across tracker worker processes sharing one tracker.db.
+
+    Every worker heartbeats into the store's `workers` table. All workers build the
+    same hash ring from the live workers (seen within `worker_ttl` seconds) and
+    each only polls the players whose PUUID lands on it, so every player has
+    exactly one poller and notifications aren't duplicated. When a worker joins or
+    dies, the ring changes on the next heartbeat and players move with it.
+
+    A new worker only joins the ring `settle` seconds after its first heartbeat, by
+    which time every other worker has seen it too, so handoffs don't overlap. The
+    Riot rate-limit budget is split evenly between the live workers.
+    """
+
+    def __init__(self, worker_id: str, store=tracker_store, rate_limiter=None,
+                 heartbeat_interval: float = 10.0, worker_ttl: float = 30.0):
+        self.worker_id = worker_id
+        self.store = store
+        self.rate_limiter = rate_limiter or riot_http.rate_limiter
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_ttl = worker_ttl
+        self.settle = 2 * heartbeat_interval
+        self.ring = HashRing([])  # Owns nothing until this worker has settled in
+        self.live_workers: Set[str] = set()
+        self._listeners: List[Callable[[], Union[None, Awaitable[None]]]] = []
+        self._task: Optional[asyncio.Task] = None
+        atexit.register(self.stop)
+
+    def owns(self, key: str) -> bool:
+        """Whether this worker should poll the player identified by `key` (their PUUID)."""
+        return self.ring.owner(key) == self.worker_id
+
+    def on_change(self, callback: Callable[[], Union[None, Awaitable[None]]]):
+        """Call `callback` after every heartbeat (e.g. to pick up players other workers added)."""
+        self._listeners.append(callback)
+
+    async def refresh(self):
+        """Heartbeat once and rebuild the ring if workers joined or left."""
+        rows = await asyncio.to_thread(self.store.heartbeat, self.worker_id)
+        now = time.time()
+        live = set()
+        for worker_id, joined_at, last_seen in rows:
+            if now - last_seen > self.worker_ttl:
+                # Crashed without saying goodbye
+                await asyncio.to_thread(self.store.remove_worker, worker_id)
+            elif now - joined_at >= self.settle:
+                live.add(worker_id)
+
+        if set(self.ring.nodes) != live:
+            logger.info(f"Tracker workers changed: {sorted(self.ring.nodes)} -> {sorted(live)}")
+            self.ring = HashRing(sorted(live))
+            self.live_workers = live
+            if live:
+                self.rate_limiter.set_share(1 / len(live))
+        for callback in self._listeners:
+            try:
+                result = callback()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in shard change listener: {str(e)}")
+
+    async def run(self):
+        """Heartbeat until stopped."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Shard heartbeat failed: {str(e)}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _reset_loop_state(self):
+        # The heartbeat task died with the old loop
+        self._task = None
+
+    def start(self):
+        self._check_loop()
+        if self._task is None or self._task.done():
+            self._task = self._loop.create_task(self.run())
+            logger.info(f"Started tracker worker {self.worker_id}")
+
+    def stop(self):
+        """Leave the ring so the other workers take over right away. Runs at exit."""
+        if self._task is not None and not self._task.done() and not self._loop.is_closed():
+            self._task.cancel()
+        try:
+            self.store.remove_worker(self.worker_id)
+        except Exception as e:
+            logger.error(f"Error removing tracker worker {self.worker_id}: {str(e)}")
+
+def get_shard_coordinator() -> Optional[ShardCoordinator]:
+    """The coordinator for this process, or None when sharding is off (TRACKER_WORKER_ID unset)."""
+    worker_id = os.getenv("TRACKER_WORKER_ID")
+    if not worker_id:
+        return None
+    return ShardCoordinator(worker_id)
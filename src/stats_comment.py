@@ -1,17 +1,21 @@
 import os
 import logging
-from typing import Dict, Optional
-from src.ai_handler import try_groq_api
+from typing import Dict, List, Tuple
+from src.batch_comment import generate_comments
 
 logger = logging.getLogger(__name__)
 
-async def generate_match_comment(stats: Dict, player_name: str) -> str:
-    """Generate an AI comment in Vietnamese based on match stats."""
-    if not stats:
-        return "Không có dữ liệu để phân tích."
-    
-    # Build stats summary for AI
-    stats_summary = f"""
+SYSTEM_PROMPT = """Bạn là một người bạn thân thiết, hài hước và châm biếm. Bạn đang xem thống kê trận đấu Valorant của một người bạn và đưa ra nhận xét ngắn gọn, vui vẻ bằng tiếng Việt. Hãy:
+- Đưa ra nhận xét dựa trên thống kê
+- Nếu thắng và chơi tốt: khen ngợi nhưng đừng quá nghiêm túc
+- Nếu thua hoặc chơi kém: động viên một cách hài hước, có thể châm biếm nhẹ nhàng
+- Giữ tông điệu trẻ trung, vui vẻ
+- Chỉ viết 1-2 câu ngắn gọn
+- Không quá dài dòng"""
+
+def build_stats_summary(stats: Dict, player_name: str) -> str:
+    """Stats of one player's Valorant match, as text for the AI."""
+    return f"""
 Thống kê trận đấu Valorant của {player_name}:
 - Kết quả: {'THẮNG' if stats['won'] else 'THUA'} với tỷ số {stats['final_score']}
 - K/D/A: {stats['kills']}/{stats['deaths']}/{stats['assists']} (K/D ratio: {stats['kd_ratio']})
@@ -21,36 +25,12 @@ Thống kê trận đấu Valorant của {player_name}:
 - Headshot: {stats['headshot_percentage']}%
 - Agent sử dụng: {stats['agent']}
 """
-    
-    # Determine performance level
+
+def fallback_comment(stats: Dict) -> str:
+    """Rule-based comment, used when the AI is unavailable."""
     kd = stats['kd_ratio']
-    kills = stats['kills']
     won = stats['won']
     
-    performance = "xuất sắc" if kd >= 2.0 and kills >= 20 else \
-                  "tốt" if kd >= 1.5 and kills >= 15 else \
-                  "ổn" if kd >= 1.0 else \
-                  "cần cải thiện"
-    
-    # Build prompt for AI
-    system_prompt = """Bạn là một người bạn thân thiết, hài hước và châm biếm. Bạn đang xem thống kê trận đấu Valorant của một người bạn và đưa ra nhận xét ngắn gọn, vui vẻ bằng tiếng Việt. Hãy:
-- Đưa ra nhận xét dựa trên thống kê
-- Nếu thắng và chơi tốt: khen ngợi nhưng đừng quá nghiêm túc
-- Nếu thua hoặc chơi kém: động viên một cách hài hước, có thể châm biếm nhẹ nhàng
-- Giữ tông điệu trẻ trung, vui vẻ
-- Chỉ viết 1-2 câu ngắn gọn
-- Không quá dài dòng"""
-    
-    user_message = f"{stats_summary}\nHãy đưa ra một nhận xét ngắn gọn và hài hước về trận đấu này:"
-    
-    try:
-        comment = await try_groq_api(system_prompt, user_message, "")
-        if comment:
-            return comment.strip()
-    except Exception as e:
-        logger.error(f"Error generating AI comment: {str(e)}")
-    
-    # Fallback to simple comment
     if won:
         if kd >= 2.0:
             return f"🔥 Chơi xuất sắc! {kd} K/D là level pro rồi đó!"
@@ -66,3 +46,14 @@ Thống kê trận đấu Valorant của {player_name}:
         else:
             return f"🤝 Thua nhưng chơi ổn! K/D {kd} không tệ đâu!"
 
+async def generate_match_comment(stats: Dict, player_name: str) -> str:
+    """Generate an AI comment in Vietnamese based on match stats."""
+    if not stats:
+        return "Không có dữ liệu để phân tích."
+    return (await generate_match_comments([(stats, player_name)]))[0]
+
+async def generate_match_comments(players: List[Tuple[Dict, str]]) -> List[str]:
+    """Generate comments for several players' matches with one AI call. Takes [(stats, player_name)]."""
+    summaries = [build_stats_summary(stats, player_name) for stats, player_name in players]
+    fallbacks = [fallback_comment(stats) for stats, _ in players]
+    return await generate_comments(SYSTEM_PROMPT, summaries, fallbacks)
@@ -0,0 +1,58 @@
+import os
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+class StreamingReply:
+    """Shows a reply while it is being generated by editing one Discord message.
+
+    The message is posted as soon as the first few characters arrive and then
+    edited at most once every `edit_interval` seconds, which stays well inside
+    Discord's edit rate limit (5 edits per 5 seconds per channel).
+    """
+
+    def __init__(self, channel, edit_interval: float = 1.2, min_first_chars: int = 10):
+        self.channel = channel
+        self.edit_interval = edit_interval
+        self.min_first_chars = min_first_chars
+        self.message = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    async def _show(self, text: str):
+        text = text[:DISCORD_MESSAGE_LIMIT]
+        if text == self._shown:
+            return
+        if self.message is None:
+            self.message = await self.channel.send(text)
+        else:
+            await self.message.edit(content=text)
+        self._shown = text
+        self._last_edit = time.monotonic()
+
+    async def update(self, text: str):
+        """Report the reply so far; posts or edits the message if it's time to."""
+        if self.message is None and len(text.strip()) < self.min_first_chars:
+            return
+        if time.monotonic() - self._last_edit < self.edit_interval:
+            return
+        try:
+            await self._show(text)
+        except Exception as e:
+            # A failed preview is not fatal, finish() still sends the full reply
+            logger.warning(f"Could not update streaming reply: {str(e)}")
+
+    async def finish(self, text: Optional[str]):
+        """Show the final reply: one edit if a preview was posted, else a normal send."""
+        if not text:
+            if self.message is not None:
+                await self.message.delete()
+            return
+        await self._show(text)
+
+# Seconds between edits of a streaming reply; 0 disables streaming
+STREAM_EDIT_INTERVAL = float(os.getenv("CHAT_STREAM_EDIT_INTERVAL", "1.2"))
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+from src.loop_bound import LoopBound
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tracker.db")
+
+class TrackerStore(LoopBound):
+    """SQLite-backed key/value store for tracker state that must survive restarts.
+
+    Values are grouped by namespace (e.g. "lol:tracked_players") and stored as JSON.
+    Writes are buffered in memory and flushed in one transaction every
+    `flush_interval` seconds (write-behind), off the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 5.0):
+        self.path = path or os.getenv("TRACKER_DB_PATH", DEFAULT_DB_PATH)
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Optional[str]] = {}  # {(namespace, key): json, or None to delete}
+        self._written: Dict[Tuple[str, str], str] = {}  # Last persisted JSON, to skip no-op writes
+        self._flushing: List[Dict[Tuple[str, str], Optional[str]]] = []  # Batches being written right now
+        self._write_seq = 0
+        self._changed_at: Dict[Tuple[str, str], int] = {}  # {(namespace, key): _write_seq of its last put/delete}
+        self._flush_task: Optional[asyncio.Task] = None
+        atexit.register(self.flush_sync)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            # Tracker worker processes sharing this database (see src/sharding.py)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "worker_id TEXT PRIMARY KEY, joined_at REAL NOT NULL, last_seen REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def load(self, namespace: str, quiet: bool = False) -> Dict[str, Any]:
+        """Load every key of a namespace. Called at startup, and by sharded workers to pick up other workers' changes."""
+        try:
+            with self._db_lock:
+                rows = self._connect().execute(
+                    "SELECT key, value FROM state WHERE namespace = ?", (namespace,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading {namespace} from tracker store: {str(e)}")
+            return {}
+
+        # Another process may have deleted keys we wrote earlier
+        for item_key in [item_key for item_key in self._written if item_key[0] == namespace]:
+            del self._written[item_key]
+        data = {}
+        for key, value in rows:
+            self._written[(namespace, key)] = value
+            data[key] = json.loads(value)
+        if data and not quiet:
+            logger.info(f"Loaded {len(data)} entries for {namespace} from tracker store")
+        return data
+
+    async def reload(self, namespace: str, current: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a namespace in a worker thread to pick up other processes' changes.
+
+        Keys this process changed that may not be in the database yet (queued,
+        being flushed, or written while loading) keep their value from `current`.
+        """
+        since = self._write_seq
+        unsaved = self._unsaved_keys(namespace)
+        stored = await asyncio.to_thread(self.load, namespace, True)
+        unsaved |= self._unsaved_keys(namespace, since)
+        for key in unsaved:
+            if key in current:
+                stored[key] = current[key]
+            else:
+                stored.pop(key, None)
+        return stored
+
+    def _unsaved_keys(self, namespace: str, since: Optional[int] = None) -> Set[str]:
+        """Keys with writes not yet persisted, plus (with `since`) keys changed after that sequence number."""
+        keys = {key for ns, key in self._pending if ns == namespace}
+        for batch in self._flushing:
+            keys.update(key for ns, key in batch if ns == namespace)
+        if since is not None:
+            keys.update(key for (ns, key), seq in self._changed_at.items() if ns == namespace and seq > since)
+        return keys
+
+    def _mark_changed(self, namespace: str, key: str):
+        self._write_seq += 1
+        self._changed_at[(namespace, key)] = self._write_seq
+
+    def put(self, namespace: str, key: str, value: Any):
+        """Queue a value to be written on the next flush."""
+        encoded = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        if self._written.get((namespace, key)) == encoded and (namespace, key) not in self._pending:
+            return
+        self._pending[(namespace, key)] = encoded
+        self._mark_changed(namespace, key)
+        self._ensure_flusher()
+
+    def delete(self, namespace: str, key: str):
+        """Queue a key to be deleted on the next flush."""
+        self._pending[(namespace, key)] = None
+        self._mark_changed(namespace, key)
+        self._ensure_flusher()
+
+    def _write_batch(self, batch: Dict[Tuple[str, str], Optional[str]]):
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                for (namespace, key), value in batch.items():
+                    if value is None:
+                        conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)",
+                            (namespace, key, value)
+                        )
+        for (namespace, key), value in batch.items():
+            if value is None:
+                self._written.pop((namespace, key), None)
+            else:
+                self._written[(namespace, key)] = value
+
+    def heartbeat(self, worker_id: str) -> List[Tuple[str, float, float]]:
+        """Mark a worker as alive and return every worker as [(worker_id, joined_at, last_seen)].
+
+        Blocking; call it through asyncio.to_thread.
+        """
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO workers (worker_id, joined_at, last_seen) VALUES (?, ?, ?) "
+                    "ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+                    (worker_id, now, now)
+                )
+            return conn.execute("SELECT worker_id, joined_at, last_seen FROM workers").fetchall()
+
+    def remove_worker(self, worker_id: str):
+        """Forget a worker, e.g. on clean shutdown or once its heartbeat has expired."""
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def _take_pending(self) -> Dict[Tuple[str, str], Optional[str]]:
+        batch = self._pending
+        self._pending = {}
+        return batch
+
+    async def flush(self):
+        """Write all pending changes in one transaction, in a worker thread."""
+        batch = self._take_pending()
+        if not batch:
+            return
+        self._flushing.append(batch)
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except sqlite3.Error as e:
+            logger.error(f"Error flushing tracker store: {str(e)}")
+            # Put the batch back unless newer writes superseded it
+            for item_key, value in batch.items():
+                self._pending.setdefault(item_key, value)
+        finally:
+            self._flushing.remove(batch)
+
+    def flush_sync(self):
+        """Write all pending changes from the calling thread (used at exit)."""
+        batch = self._take_pending()
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Error flushing tracker store: {str(e)}")
+
+    def _reset_loop_state(self):
+        # The flush task died with the old loop
+        self._flush_task = None
+
+    def _ensure_flusher(self):
+        """Start the background flush loop if an event loop is running."""
+        try:
+            self._check_loop()
+        except RuntimeError:
+            # No running loop (e.g. startup or tests); the next put() or exit flushes
+            return
+        if self._flush_task and not self._flush_task.done():
+            return
+        self._flush_task = self._loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+# Global store shared by all trackers
+tracker_store = TrackerStore()
@@ -1,30 +1,14 @@
-from src.constants import SPECIAL_USERS
-
-### Check user hiearchy ###
-# User is DeadBush
-def is_user_DeadBush(author_str):
-    # Check if user is DeadBush
-    if author_str == "DeadBush":
-        return True
-    return False
-
-# User is Skye._
-def is_user_Skye(author_str):
-    # Check if user is Skye._
-    if author_str == "Skye._":
-        return True
-    return False   
-
-# User is Kaisen#exson
-def is_user_Kaisen(author_str):
-    # Check if user is Kaisen#exson
-    if author_str == "Kaisen#exson":
-        return True
-    return False
-
-# User is Toman
-def is_user_ToMan(author_str):
-    # Check if user is To Man
-    if author_str == "To Man":
-        return True
-    return False
\ No newline at end of file
+import re
+import unicodedata
+
+### Text normalization ###
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION_RE = re.compile(r"^[\W_]+|[\W_]+$")
+
+def normalize_vietnamese(text):
+    # NFC so Telex/VNI/Unikey inputs of the same word compare equal, then casefold
+    # (keeps diacritics: "ma" and "mà" are different words)
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    # Ignore surrounding punctuation and emoji, e.g. "mày tên gì???" == "mày tên gì"
+    return _EDGE_PUNCTUATION_RE.sub("", text)
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Keep the global tracker store out of the repo's tracker.db
+os.environ.setdefault("TRACKER_DB_PATH", os.path.join(tempfile.mkdtemp(), "tracker.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+from src.constants import KEYWORD_RULES, PERSONAL_INFO, SPECIAL_RESPONSES
+from src.keyword_router import KeywordRouter
+
+def old_if_chain(message):
+    """The fast paths as they were before the router: personal info first, then special responses."""
+    if 'tên' in message:
+        return f"{PERSONAL_INFO['name']} đây! 😎"
+    elif 'quê' in message or 'ở đâu' in message:
+        return f"Tớ là dân {PERSONAL_INFO['hometown']} chính hiệu con rồng cháu tiên 😄"
+    elif 'giới tính' in message:
+        return f"{PERSONAL_INFO['gender']} nha, đẹp trai lắm 😌"
+    elif 'học đại học' in message or 'đại học' in message:
+        return f"Tớ là sinh viên {PERSONAL_INFO['university']} đó! 🎓"
+    elif 'thcs' in message or 'cấp 2' in message:
+        return f"Hồi cấp 2 tớ học ở {PERSONAL_INFO['middle_school']} 📚"
+    elif 'thpt' in message or 'cấp 3' in message:
+        return f"Tớ là cựu học sinh {PERSONAL_INFO['high_school']} nè 🏫"
+    elif 'trường' in message:
+        return f"Tớ tự hào khi là sinh viên {PERSONAL_INFO['university']} !!"
+    elif 'ngày sinh' in message or 'sinh nhật' in message or 'sinh ngày' in message or 'tuổi' in message:
+        return f"Tớ sinh ngày {PERSONAL_INFO['birthday']} nè! 🎂"
+    if "Minh" in message or "minh" in message:
+        return f"{SPECIAL_RESPONSES['Minh']}"
+    elif "Mẫn" in message or "mẫn" in message:
+        return f"{SPECIAL_RESPONSES['Mẫn']}"
+    return None
+
+KEYWORDS = sorted({keyword for rule in KEYWORD_RULES for keyword in rule["keywords"]})
+MESSAGES = [f"{first} với {second} nè" for first, second in itertools.permutations(KEYWORDS, 2)]
+MESSAGES += ["xin chào", "hôm nay ăn gì", "bạn bao nhiêu tuổi", "MINH đâu rồi"]
+
+@pytest.fixture
+def router():
+    return KeywordRouter(KEYWORD_RULES)
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_matches_old_if_chain(router, message):
+    assert router.match(message.lower()) == old_if_chain(message.lower())
+
+def test_groups_limit_the_rules(router):
+    assert router.match("tên minh là gì", groups=("special",)) == SPECIAL_RESPONSES["Minh"]
+    assert router.match("tên minh là gì", groups=()) is None
+
+def test_counts_hits_per_rule(router):
+    router.match("quê ở đâu")
+    router.match("tên gì")
+    router.match("tên thật")
+    assert router.stats() == {"name": 2, "hometown": 1, **{rule["name"]: 0 for rule in KEYWORD_RULES[2:]}}
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from src.game_tracker import GameAdapter, LobbyIndex, TrackerEngine
+from src.riot_http import RiotAPIError
+from src.tracker_store import TrackerStore
+
+class SoloAdapter(GameAdapter):
+    """Payloads don't list participants (like Valorant)."""
+
+    game = "solo"
+    label = "Solo"
+
+    def match_id(self, payload):
+        return payload["id"]
+
+class LobbyAdapter(SoloAdapter):
+    """Payloads list every participant (like League)."""
+
+    game = "lobby"
+
+    def participant_ids(self, payload):
+        return payload["players"]
+
+def players(*puuids, in_match=None):
+    return {
+        puuid: {"riot_name": puuid, "riot_tag": "1", "puuid": puuid,
+                "in_match": in_match is not None, "current_match_id": in_match}
+        for puuid in puuids
+    }
+
+def counting_fetch(calls, result, delay=0.01):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return fetch
+
+def test_lobby_starting_together_shares_one_call():
+    async def run():
+        tracked = players("a", "b", "c", "d", "e")
+        lobbies = LobbyIndex(tracked, LobbyAdapter())
+        payload = {"id": "g1", "players": list(tracked)}
+        calls = []
+        results = await asyncio.gather(*(
+            lobbies.get_current_match(uid, info, counting_fetch(calls, payload))
+            for uid, info in tracked.items()
+        ))
+        return calls, results, lobbies
+
+    calls, results, lobbies = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result["id"] == "g1" for result in results)
+    assert lobbies.calls_saved == 4
+
+def test_solo_adapter_does_not_wait_for_other_players_calls():
+    async def run():
+        tracked = players("a", "b")
+        lobbies = LobbyIndex(tracked, SoloAdapter())
+        release = asyncio.Event()
+
+        async def slow_fetch():
+            await release.wait()
+            return None
+
+        slow = asyncio.ensure_future(lobbies.get_current_match("a", tracked["a"], slow_fetch))
+        await asyncio.sleep(0)
+        fast = await asyncio.wait_for(lobbies.get_current_match("b", tracked["b"], counting_fetch([], None)), 1)
+        release.set()
+        await slow
+        return fast
+
+    assert asyncio.run(run()) is None
+
+def test_ended_game_is_checked_once_for_the_lobby():
+    async def run():
+        tracked = players("a", "b", in_match="g1")
+        lobbies = LobbyIndex(tracked, LobbyAdapter())
+        calls = []
+        results = await asyncio.gather(*(
+            lobbies.get_current_match(uid, info, counting_fetch(calls, None))
+            for uid, info in tracked.items()
+        ))
+        return calls, results
+
+    calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [None, None]
+
+def test_failed_call_is_not_shared_as_game_over():
+    async def run():
+        tracked = players("a", "b", in_match="g1")
+        lobbies = LobbyIndex(tracked, LobbyAdapter())
+        payload = {"id": "g1", "players": ["a", "b"]}
+        first = asyncio.ensure_future(
+            lobbies.get_current_match("a", tracked["a"], counting_fetch([], RiotAPIError(503)))
+        )
+        await asyncio.sleep(0)
+        calls = []
+        second = await lobbies.get_current_match("b", tracked["b"], counting_fetch(calls, payload))
+        with pytest.raises(RiotAPIError):
+            await first
+        return calls, second, lobbies
+
+    calls, second, lobbies = asyncio.run(run())
+    assert len(calls) == 1  # The lobby-mate made its own call instead of inheriting the error
+    assert second["id"] == "g1"
+    assert lobbies.games["g1"] is not None
+
+def test_api_error_leaves_lobby_in_match(tmp_path):
+    class FailingAdapter(LobbyAdapter):
+        async def get_current_match(self, player_info):
+            raise RiotAPIError(500, "Internal error")
+
+    async def run():
+        engine = TrackerEngine(store=TrackerStore(str(tmp_path / "tracker.db")))
+        tracker = engine.register(FailingAdapter())
+        tracker.tracked_players.update(players("a", "b", in_match="g1"))
+        return tracker, await tracker.check_for_new_matches()
+
+    tracker, events = asyncio.run(run())
+    assert events == []
+    for player_info in tracker.tracked_players.values():
+        assert player_info["in_match"] is True
+        assert player_info["current_match_id"] == "g1"
+        assert not player_info.get("pending_match_end")
+
+@pytest.mark.parametrize("status, expected", [(404, None), (200, {"gameId": 1})])
+def test_active_game_lookup_only_reports_no_game_on_404(monkeypatch, status, expected):
+    from src.lol_tracker import lol_tracker
+    from src.riot_http import RiotResponse, riot_http
+
+    async def get(host, path, params=None, method=None):
+        return RiotResponse(status, '{"gameId": 1}' if status == 200 else "", {})
+
+    monkeypatch.setattr(riot_http, "get", get)
+    monkeypatch.setattr(lol_tracker.adapter, "api_key", "key")
+    assert asyncio.run(lol_tracker.adapter.get_active_game("summoner", "vn2")) == expected
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_active_game_lookup_raises_on_api_errors(monkeypatch, status):
+    from src.riot_tracker import riot_tracker
+    from src.riot_http import RiotResponse, riot_http
+
+    async def get(host, path, params=None, method=None):
+        return RiotResponse(status, "error", {})
+
+    monkeypatch.setattr(riot_http, "get", get)
+    monkeypatch.setattr(riot_tracker.adapter, "api_key", "key")
+    with pytest.raises(RiotAPIError):
+        asyncio.run(riot_tracker.adapter.get_active_match("puuid"))
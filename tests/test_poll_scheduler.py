@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+
+from src.poll_scheduler import PollScheduler
+
+def test_pops_only_due_keys_in_order():
+    scheduler = PollScheduler()
+    scheduler.schedule("later", 100)
+    scheduler.schedule("a", 0)
+    scheduler.schedule("b", 0)
+    assert scheduler.pop_due() == ["a", "b"]
+    assert list(scheduler._due) == ["later"]
+    assert scheduler.seconds_until_next() == pytest.approx(100, abs=1)
+
+def test_reschedule_replaces_the_old_due_time():
+    scheduler = PollScheduler()
+    scheduler.schedule("a", 0)
+    scheduler.schedule("a", 100)
+    assert scheduler.pop_due() == []
+    scheduler.schedule("a", 0)
+    assert scheduler.pop_due() == ["a"]
+    assert scheduler.pop_due() == [] and len(scheduler) == 0
+
+def test_removed_keys_are_never_popped():
+    scheduler = PollScheduler()
+    scheduler.schedule("a", 0)
+    scheduler.remove("a")
+    assert "a" not in scheduler
+    assert scheduler.pop_due() == []
+    assert scheduler.seconds_until_next() is None
+
+def test_bump_wakes_the_poll_loop():
+    async def run():
+        scheduler = PollScheduler()
+        scheduler.schedule("a", 100)
+        started = time.monotonic()
+        waiting = asyncio.ensure_future(scheduler.wait(max_wait=10))
+        await asyncio.sleep(0.01)
+        scheduler.bump("a")
+        await waiting
+        return time.monotonic() - started, scheduler.pop_due()
+
+    elapsed, due = asyncio.run(run())
+    assert elapsed < 1
+    assert due == ["a"]
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from src.rate_limiter import RiotRateLimiter, TokenBucket, parse_rate_limit_header
+
+def test_parse_rate_limit_header():
+    assert parse_rate_limit_header("20:1,100:120") == [(20, 1), (100, 120)]
+    assert parse_rate_limit_header("20:1,junk") == [(20, 1)]
+    assert parse_rate_limit_header(None) == []
+
+def test_token_bucket_empties_and_refills():
+    bucket = TokenBucket(2, 10)
+    now = bucket.updated
+    assert bucket.wait_time(now) == 0
+    bucket.consume()
+    bucket.consume()
+    assert bucket.wait_time(now) == pytest.approx(5.0)  # One token every 10 / 2 seconds
+    assert bucket.wait_time(now + 5.0) == 0
+    assert bucket.wait_time(now + 100.0) == 0 and bucket.tokens == 2  # Never above the limit
+
+def test_token_bucket_sync_only_lowers_tokens():
+    bucket = TokenBucket(20, 1)
+    bucket.sync(15)
+    assert bucket.tokens == 5
+    bucket.sync(2)
+    assert bucket.tokens == 5
+
+def buckets(limiter, key):
+    return {bucket.window: bucket for bucket in limiter._buckets[key]}
+
+def test_headers_set_limits_and_usage():
+    limiter = RiotRateLimiter()
+    limiter.update("asia", "account", 200, {
+        "X-App-Rate-Limit": "500:10,30000:600",
+        "X-App-Rate-Limit-Count": "100:10,1000:600",
+        "X-Method-Rate-Limit": "2000:10",
+        "X-Method-Rate-Limit-Count": "1990:10",
+    })
+    app = buckets(limiter, "app:asia")
+    assert (app[10].limit, app[600].limit) == (500, 30000)
+    assert app[10].tokens == 400 and app[600].tokens == 29000
+    assert buckets(limiter, "method:asia:account")[10].tokens == 10
+
+def test_shared_key_counts_are_compared_with_the_full_limit():
+    limiter = RiotRateLimiter()
+    limiter.set_share(0.5)
+    limiter.update("asia", "account", 200, {"X-App-Rate-Limit": "20:1", "X-App-Rate-Limit-Count": "15:1"})
+    bucket = buckets(limiter, "app:asia")[1]
+    assert bucket.limit == 10
+    assert bucket.tokens == 5  # 15 of 20 used key-wide leaves 5, all within this process's 10
+
+@pytest.mark.parametrize("limit_type, blocked", [("application", "app:asia"), ("method", "method:asia:account")])
+def test_429_blocks_the_limited_scope(limit_type, blocked):
+    limiter = RiotRateLimiter()
+    retry_after = limiter.update("asia", "account", 429, {"Retry-After": "3", "X-Rate-Limit-Type": limit_type})
+    assert retry_after == 3
+    assert set(limiter._blocked_until) == {blocked}
+    assert limiter._blocked_until[blocked] == pytest.approx(time.monotonic() + 3, abs=0.5)
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+import src.ai_handler as ai
+from src.conversation_memory import ConversationMemory, is_follow_up
+from src.response_cache import ResponseCache
+
+@pytest.mark.parametrize("message", ["tại sao?", "thật à", "còn Minh thì sao", "nó chơi game gì", "thế bạn học trường nào"])
+def test_follow_ups(message):
+    assert is_follow_up(message)
+
+@pytest.mark.parametrize("message", ["bạn tên gì vậy", "Mày học trường nào???", "quê bạn ở đâu thế"])
+def test_standalone_questions(message):
+    assert not is_follow_up(message)
+
+@pytest.fixture
+def chat(monkeypatch):
+    calls = []
+
+    async def complete(system_prompt, user_message, user_name, history):
+        calls.append(history)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(ai, "response_cache", ResponseCache())
+    monkeypatch.setattr(ai, "conversation_memory", ConversationMemory())
+    monkeypatch.setattr(ai.chat_router, "complete", complete)
+    return calls
+
+def ask(message):
+    return asyncio.run(ai.get_ai_response(message, "An", channel_id=1))
+
+def test_repeat_hits_cache_during_a_conversation(chat):
+    first = ask("bạn tên gì vậy")
+    ask("hôm nay trời đẹp quá nhỉ")
+    assert ask("Bạn tên gì vậy?") == first
+    assert len(chat) == 2
+    assert chat[1] == []  # Standalone questions don't carry the conversation
+
+def test_follow_up_gets_history_and_skips_cache(chat):
+    ask("bạn tên gì vậy")
+    ask("tại sao?")
+    ask("tại sao?")
+    assert len(chat) == 3
+    assert chat[1] and chat[2]
@@ -0,0 +1,55 @@
+import asyncio
+from collections import Counter
+
+from src.sharding import HashRing, ShardCoordinator
+from src.tracker_store import TrackerStore
+
+KEYS = [f"puuid-{i}" for i in range(2000)]
+
+def test_empty_ring_owns_nothing():
+    assert HashRing([]).owner("puuid") is None
+
+def test_owner_does_not_depend_on_worker_order():
+    ring, shuffled = HashRing(["w1", "w2", "w3"]), HashRing(["w3", "w1", "w2"])
+    assert all(ring.owner(key) == shuffled.owner(key) for key in KEYS)
+
+def test_keys_are_spread_across_workers():
+    ring = HashRing(["w1", "w2", "w3", "w4"])
+    counts = Counter(ring.owner(key) for key in KEYS)
+    assert set(counts) == {"w1", "w2", "w3", "w4"}
+    assert min(counts.values()) > len(KEYS) / 4 * 0.5
+
+def test_adding_a_worker_only_moves_keys_to_it():
+    before = HashRing(["w1", "w2", "w3"])
+    after = HashRing(["w1", "w2", "w3", "w4"])
+    moved = [key for key in KEYS if before.owner(key) != after.owner(key)]
+    assert all(after.owner(key) == "w4" for key in moved)
+    assert len(moved) < len(KEYS) / 2
+
+class FakeRateLimiter:
+    def __init__(self):
+        self.share = 1.0
+
+    def set_share(self, share):
+        self.share = share
+
+def test_workers_join_after_settling_and_leave_on_stop(tmp_path):
+    store = TrackerStore(str(tmp_path / "tracker.db"))
+    limiter = FakeRateLimiter()
+    first = ShardCoordinator("w1", store=store, rate_limiter=limiter, heartbeat_interval=0)
+    second = ShardCoordinator("w2", store=store, rate_limiter=limiter, heartbeat_interval=0)
+
+    async def refresh():
+        await first.refresh()
+        await second.refresh()
+        await first.refresh()  # Now it has seen w2's heartbeat too
+
+    asyncio.run(refresh())
+    assert first.live_workers == {"w1", "w2"}
+    assert limiter.share == 0.5
+    assert all(first.owns(key) != second.owns(key) for key in KEYS[:100])
+
+    second.stop()
+    asyncio.run(first.refresh())
+    assert first.live_workers == {"w1"}
+    assert all(first.owns(key) for key in KEYS[:100])
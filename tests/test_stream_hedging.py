@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import src.ai_handler as ai
+from src.llm_client import llm_client
+
+@pytest.fixture
+def providers(monkeypatch):
+    calls = {"groq": 0, "huggingface": 0}
+
+    async def groq_chat(messages, **kwargs):
+        calls["groq"] += 1
+        return "groq one-shot"
+
+    async def huggingface_generate(prompt, **kwargs):
+        calls["huggingface"] += 1
+        await asyncio.sleep(0.05)
+        return "huggingface"
+
+    monkeypatch.setattr(llm_client, "groq_chat", groq_chat)
+    monkeypatch.setattr(llm_client, "huggingface_generate", huggingface_generate)
+    monkeypatch.setattr(ai.groq_provider, "default_hedge_delay", 0.1)
+    monkeypatch.setattr(ai.groq_provider, "latencies", type(ai.groq_provider.latencies)(maxlen=50))
+    ai.groq_provider.breaker.record_success()
+    return calls
+
+def stream(first_token_delay, fail=False):
+    async def groq_chat_stream(messages, **kwargs):
+        await asyncio.sleep(first_token_delay)
+        if fail:
+            raise RuntimeError("stream failed")
+        for delta in ["xin ", "chào"]:
+            yield delta
+    return groq_chat_stream
+
+async def ignore(text):
+    pass
+
+def hedge(monkeypatch, groq_chat_stream):
+    monkeypatch.setattr(llm_client, "groq_chat_stream", groq_chat_stream)
+    return asyncio.run(ai.stream_with_hedging("system", "hỏi", "user", ignore))
+
+def test_fast_stream_records_latency(monkeypatch, providers):
+    assert hedge(monkeypatch, stream(0)) == "xin chào"
+    assert len(ai.groq_provider.latencies) == 1
+    assert providers == {"groq": 0, "huggingface": 0}
+
+def test_stalled_stream_hedges_without_calling_groq_again(monkeypatch, providers):
+    assert hedge(monkeypatch, stream(5)) == "huggingface"
+    assert providers == {"groq": 0, "huggingface": 1}
+    assert not ai.groq_provider.latencies
+
+def test_failed_stream_falls_back_without_calling_groq_again(monkeypatch, providers):
+    assert hedge(monkeypatch, stream(0, fail=True)) == "huggingface"
+    assert providers == {"groq": 0, "huggingface": 1}